@@ -0,0 +1,128 @@
+# Batched OpenAI embeddings for the regulation pipeline (mass_gov.py and embeddings.py):
+# packs many chunks into each Embedding.create call, runs a few calls at once, and
+# splits a batch in half when OpenAI rejects it for rate or size.
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from chunking import count_tokens
+
+RETRYABLE_ERRORS = (
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+)
+
+
+class BatchEmbedder:
+    """
+    Embeds a list of texts with as few requests as the model's limits allow: at
+    most `max_inputs` texts and `max_batch_tokens` tokens per request, with up to
+    `concurrency` requests in flight. A rate-limited batch is backed off and retried
+    as two halves, a batch rejected as too large is split, and transient API
+    errors are retried; texts still failing after `max_retries` come back as None.
+    """
+
+    def __init__(self, model="text-embedding-ada-002", max_inputs=2048, max_batch_tokens=100000,
+                 concurrency=4, max_retries=5, max_backoff_seconds=60):
+        self.model = model
+        self.max_inputs = max_inputs
+        self.max_batch_tokens = max_batch_tokens
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.max_backoff_seconds = max_backoff_seconds
+        self._lock = threading.Lock()
+        self._counters = {}
+        self.last_report = None
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _batches(self, texts):
+        batch, tokens = [], 0
+        for i, text in enumerate(texts):
+            n = count_tokens(text)
+            if batch and (len(batch) >= self.max_inputs or tokens + n > self.max_batch_tokens):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(i)
+            tokens += n
+        if batch:
+            yield batch
+
+    def _backoff(self, attempt):
+        return min(self.max_backoff_seconds, 2 ** attempt)
+
+    def _embed_batch(self, texts, indexes, results, attempt=0):
+        self._count("requests")
+        try:
+            response = openai.Embedding.create(model=self.model, input=[texts[i] for i in indexes])
+        except openai.error.RateLimitError as e:
+            self._count("rate_limited")
+            if attempt >= self.max_retries:
+                print(f"Giving up on {len(indexes)} texts after {attempt} retries: {e}")
+                self._count("failed", len(indexes))
+                return
+            time.sleep(self._backoff(attempt))
+            return self._split(texts, indexes, results, attempt + 1)
+        except openai.error.InvalidRequestError as e:
+            message = str(e).lower()
+            if len(indexes) > 1 and ("token" in message or "too many" in message or "maximum" in message):
+                self._count("size_rejected")
+                return self._split(texts, indexes, results, attempt)
+            print(f"Embedding request for {len(indexes)} texts rejected: {e}")
+            self._count("failed", len(indexes))
+            return
+        except RETRYABLE_ERRORS as e:
+            self._count("retries")
+            if attempt >= self.max_retries:
+                print(f"Giving up on {len(indexes)} texts after {attempt} retries: {e}")
+                self._count("failed", len(indexes))
+                return
+            time.sleep(self._backoff(attempt))
+            return self._embed_batch(texts, indexes, results, attempt + 1)
+
+        for item in response['data']:
+            results[indexes[item['index']]] = item['embedding']
+        self._count("embedded", len(indexes))
+
+    def _split(self, texts, indexes, results, attempt):
+        if len(indexes) == 1:
+            return self._embed_batch(texts, indexes, results, attempt)
+        self._count("splits")
+        middle = len(indexes) // 2
+        self._embed_batch(texts, indexes[:middle], results, attempt)
+        self._embed_batch(texts, indexes[middle:], results, attempt)
+
+    def embed(self, texts):
+        """Returns one embedding (or None if it failed) per text, in order."""
+        results = [None] * len(texts)
+        if not texts:
+            return results
+        with self._lock:
+            self._counters = {}
+        started = time.monotonic()
+        batches = list(self._batches(texts))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for future in [pool.submit(self._embed_batch, texts, batch, results) for batch in batches]:
+                future.result()
+        elapsed = time.monotonic() - started
+        report = self.last_report = self.report(len(texts), len(batches), elapsed)
+        print(f"Embedded {report['embedded']}/{len(texts)} chunks in {report['requests']} requests "
+              f"({len(batches)} batches, {report['splits']} splits, {report['rate_limited']} rate-limited) "
+              f"in {elapsed:.1f}s: {report['chunks_per_second']:.1f} chunks/s")
+        return results
+
+    def report(self, texts, batches, elapsed):
+        with self._lock:
+            counters = dict(self._counters)
+        report = {name: counters.get(name, 0) for name in
+                  ("requests", "embedded", "failed", "splits", "rate_limited", "size_rejected", "retries")}
+        report.update(texts=texts, batches=batches, seconds=round(elapsed, 3),
+                      chunks_per_second=report["embedded"] / elapsed if elapsed > 0 else 0.0)
+        return report
@@ -0,0 +1,125 @@
+# Chunking for regulation text: splits a parsed regulation into overlapping,
+# token-bounded chunks that do not cross section boundaries. Used by mass_gov.py
+# (embeddings and the BM25 index) and embeddings.py so both index the same chunks.
+
+import re
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")  # text-embedding-ada-002's encoding
+except Exception:
+    _ENCODING = None
+
+# Section headings in the CMR text, e.g. "590.003: Definitions", "590.010 Food Code",
+# "105 CMR 590.010", "SECTION 4", "Chapter 94" or "§ 12", at the start of a line. A bare
+# section number must be followed by ":" or a capitalized title word, so wrapped lines
+# such as "12.50 per permit" do not start a section.
+SECTION_HEADING = re.compile(
+    r"^[ \t]*(?:\d+[ \t]+CMR[ \t]+\d{1,3}\.\d{2,3}[A-Z]?\b|\d{1,3}\.\d{2,3}[A-Z]?(?=:|[ \t]+[A-Z][a-z]))"
+    r"|^[ \t]*(?:SECTION|Section|CHAPTER|Chapter|PART|Part)[ \t]+(?:\d+[A-Z]?|[IVXLC]+)\b|^[ \t]*§",
+    re.MULTILINE,
+)
+_UNIT_BREAK = re.compile(r"\n[ \t]*\n|(?<=[.;:])[ \t]+(?=[A-Z(\d])")
+
+
+def count_tokens(text):
+    if _ENCODING is None:
+        return (len(text) + 3) // 4
+    return len(_ENCODING.encode(text, disallowed_special=()))
+
+
+def _sections(text):
+    starts = [m.start() for m in SECTION_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        if text[start:end].strip():
+            heading = text[start:end].strip().splitlines()[0][:120]
+            yield start, end, heading
+
+
+def _units(text, start, end, max_tokens):
+    # Paragraphs and sentences as (start, end) spans; anything still over the
+    # limit is cut on word boundaries.
+    position = start
+    for m in list(_UNIT_BREAK.finditer(text, start, end)) + [None]:
+        unit_end = m.start() if m else end
+        if text[position:unit_end].strip():
+            yield from _split_long(text, position, unit_end, max_tokens)
+        position = m.end() if m else end
+
+
+def _split_long(text, start, end, max_tokens):
+    if count_tokens(text[start:end]) <= max_tokens:
+        yield start, end
+        return
+    piece_start = None
+    for m in re.finditer(r"\S+", text[start:end]):
+        word_start, word_end = start + m.start(), start + m.end()
+        if count_tokens(text[word_start:word_end]) > max_tokens:
+            if piece_start is not None:
+                yield piece_start, piece_end
+                piece_start = None
+            yield from _split_word(text, word_start, word_end, max_tokens)
+            continue
+        # Measure the whole span: per-word counts overestimate, as words merge into fewer tokens.
+        if piece_start is not None and count_tokens(text[piece_start:word_end]) > max_tokens:
+            yield piece_start, piece_end
+            piece_start = None
+        if piece_start is None:
+            piece_start = word_start
+        piece_end = word_end
+    if piece_start is not None:
+        yield piece_start, piece_end
+
+
+def _split_word(text, start, end, max_tokens):
+    # An unbroken run longer than the limit (a URL, a table flattened by PDF
+    # extraction) is cut by characters, shrinking each piece until it fits.
+    while start < end:
+        piece_end = min(end, start + max_tokens * 4)
+        tokens = count_tokens(text[start:piece_end])
+        while tokens > max_tokens and piece_end - start > 1:
+            piece_end = start + max(1, (piece_end - start) * max_tokens // (tokens + 1))
+            tokens = count_tokens(text[start:piece_end])
+        yield start, piece_end
+        start = piece_end
+
+
+def chunk_document(text, max_tokens=400, overlap_tokens=50):
+    """
+    Returns chunks as dicts with the chunk `text`, its `start`/`end` character
+    offsets in `text`, the `section` heading it belongs to and its `tokens`.
+    Consecutive chunks in a section share about `overlap_tokens` of text.
+    """
+    chunks = []
+    for section_start, section_end, heading in _sections(text):
+        units = [(s, e, count_tokens(text[s:e])) for s, e in _units(text, section_start, section_end, max_tokens)]
+        i = 0
+        while i < len(units):
+            j, tokens = i, 0
+            while j < len(units) and (j == i or tokens + units[j][2] <= max_tokens):
+                tokens += units[j][2]
+                j += 1
+            start, end = units[i][0], units[j - 1][1]
+            chunks.append({
+                "text": text[start:end].strip(),
+                "start": start,
+                "end": end,
+                "section": heading,
+                "tokens": tokens,
+            })
+            if j >= len(units):
+                break
+            # Step back over trailing units worth up to `overlap_tokens`, always moving forward.
+            k, overlap = j, 0
+            while k - 1 > i and overlap + units[k - 1][2] <= overlap_tokens:
+                k -= 1
+                overlap += units[k][2]
+            i = k
+    return chunks
+
+
+def chunk_id(source_key, index):
+    return f"{source_key}#chunk-{index:04d}"
@@ -0,0 +1,79 @@
+# Persistent embedding cache for the regulation pipeline: chunk embeddings keyed by
+# SHA-256 of the model name and the normalized chunk text, stored as two columns
+# (raw 32-byte keys, float32 vectors) in one .npz file so re-runs only embed new text.
+
+import hashlib
+import os
+
+import numpy as np
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    def __init__(self, model, dim=1536):
+        self.model = model
+        self.dim = dim
+        self._rows = {}
+        self._keys = []
+        self._vectors = []
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model}\n{normalize_text(text)}".encode("utf-8")).digest()
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        with np.load(path) as data:
+            keys, vectors = data["keys"], data["vectors"]
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            print(f"Ignoring embedding cache {path} with shape {vectors.shape}")
+            return
+        # np.bytes_ strips trailing NUL bytes; pad back to the full 32-byte digest.
+        self._keys = [bytes(k).ljust(32, b"\0") for k in keys]
+        self._vectors = list(vectors)
+        self._rows = {k: i for i, k in enumerate(self._keys)}
+        print(f"Loaded {len(self._keys)} cached embeddings from {path}")
+
+    def get(self, text):
+        key = self.key(text)
+        row = self._rows.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return self._vectors[row].tolist()
+
+    def put(self, text, vector):
+        key = self.key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        row = self._rows.get(key)
+        if row is None:
+            self._rows[key] = len(self._keys)
+            self._keys.append(key)
+            self._vectors.append(vector)
+        else:
+            self._vectors[row] = vector
+        self._used.add(key)
+
+    def touch(self, text):
+        key = self.key(text)
+        if key in self._rows:
+            self._used.add(key)
+
+    def save(self, path, only_used=True):
+        """Writes the cache; by default only entries read, written or touched since loading are kept."""
+        keep = [i for i, k in enumerate(self._keys) if not only_used or k in self._used]
+        keys = np.array([self._keys[i] for i in keep], dtype="S32")
+        vectors = np.array([self._vectors[i] for i in keep], dtype=np.float32).reshape(len(keep), self.dim)
+        # np.savez appends .npz to names without it, so write through a file object.
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, keys=keys, vectors=vectors)
+        os.replace(f"{path}.tmp", path)
+        print(f"Saved {len(keep)} cached embeddings to {path} ({len(self._keys) - len(keep)} unused dropped)")
@@ -5,6 +5,9 @@ import openai
 import pinecone
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
+from chunking import chunk_document, chunk_id
+from batch_embedder import BatchEmbedder
+from pinecone_writer import UpsertWriter
 
 load_dotenv()
 
@@ -16,9 +19,14 @@ AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
 
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME")
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+PINECONE_UPSERT_CONCURRENCY = int(os.getenv("PINECONE_UPSERT_CONCURRENCY", "4"))
 
 # OpenAI API key for embedding generation
 openai.api_key = os.getenv("OPENAI_API_KEY")
+embedder = BatchEmbedder(concurrency=EMBED_CONCURRENCY)
 
 
 # Initialize Pinecone client
@@ -49,14 +57,8 @@ session = boto3.Session(
 s3 = session.client('s3')
 
 
-# Function to split text into smaller chunks to stay within the token limit
-def split_text(text, max_tokens=8192):
-    tokens = text.split()  # Simple split; refine if necessary
-    return [tokens[i:i + max_tokens] for i in range(0, len(tokens), max_tokens)]
-
-
-# Function to create embeddings from extracted text and upload to Pinecone
-def create_embeddings_from_json(pdf_file, bucket_name, s3_folder):
+# Function to download a parsed JSON file and split its text into chunks to embed
+def load_chunk_records(pdf_file, bucket_name):
     print(f"Processing {pdf_file}...")
 
     # Download the parsed JSON from S3
@@ -65,7 +67,7 @@ def create_embeddings_from_json(pdf_file, bucket_name, s3_folder):
         json_content = json_obj['Body'].read().decode('utf-8')
     except Exception as e:
         print(f"Error downloading file {pdf_file}: {e}")
-        return
+        return []
 
     # Parse the JSON content to extract the text
     try:
@@ -73,70 +75,27 @@ def create_embeddings_from_json(pdf_file, bucket_name, s3_folder):
         extracted_text = parsed_data.get('content', "")
     except Exception as e:
         print(f"Error parsing JSON for {pdf_file}: {e}")
-        return
+        return []
 
     if not extracted_text:
         print(f"No content found in {pdf_file}")
-        return
-
-    # Truncate text to the max token limit
-    extracted_text = extracted_text[:8192]  # Simple truncation (for large text)
-
-    # Split the extracted text into smaller chunks to avoid token limits
-    text_chunks = split_text(extracted_text)
-
-    embeddings = []
-    for chunk in text_chunks:
-        try:
-            response = openai.Embedding.create(
-                model="text-embedding-ada-002",
-                input=" ".join(chunk)
-            )
-            embeddings.append(response.data[0].embedding)  # Correctly access the embedding
-        except Exception as e:
-            print(f"Error creating embeddings for {pdf_file}: {e}")
-            continue
-
-    if not embeddings:
-        print(f"No embeddings created for {pdf_file}")
-        return
-
-    # Flatten the embeddings (if they are nested lists)
-    embeddings_flat = [item for sublist in embeddings for item in sublist]
-
-    # Prepare metadata for Pinecone
-    metadata = {
-        "pdf_file": pdf_file,
-        "content": extracted_text[:500]  # Store the first 500 characters as a preview
-    }
-    print(f"Embedding length: {len(embeddings_flat)}")  # Ensure the embeddings are flat
-
-    # Upload embeddings to Pinecone
-    try:
-        # Note that we use the PDF filename as the ID
-        upsert_response = index.upsert(
-            vectors=[(pdf_file, embeddings_flat, metadata)] 
-        )
-        print(f"Uploaded embedding for {pdf_file} to Pinecone")
-    except Exception as e:
-        print(f"Error uploading to Pinecone for {pdf_file}: {e}")
-        return
+        return []
 
-    # Optionally, save the preview of the text back to S3
-    json_filename = pdf_file.split('/')[-1].replace(".pdf", ".json")
-    json_content = json.dumps({"content": extracted_text})
-    
-    try:
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=f"{s3_folder}/{json_filename}",
-            Body=json_content,
-            ContentType='application/json'
-        )
-        print(f"Extracted text uploaded as {json_filename} to {s3_folder}")
-    except Exception as e:
-        print(f"Error uploading {json_filename} to S3: {e}")
+    # Section-bounded, overlapping chunks; each gets its own vector (same ids as the mass_gov DAG)
+    chunks = chunk_document(extracted_text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS)
 
+    records = []
+    for n, chunk in enumerate(chunks):
+        metadata = {
+            "pdf_file": pdf_file,
+            "content": chunk["text"],
+            "section": chunk["section"],
+            "chunk_index": n,
+            "start_char": chunk["start"],
+            "end_char": chunk["end"],
+        }
+        records.append({"id": chunk_id(pdf_file, n), "text": chunk["text"], "metadata": metadata})
+    return records
 
 
 # List JSON files in the S3 folder
@@ -162,6 +121,22 @@ if __name__ == "__main__":
     else:
         print(f"Found {len(json_files)} JSON files in {S3_PATH_TGT_PYPDF}")
         
-        # Process each JSON file and create embeddings
-        for json_file in json_files:
-            create_embeddings_from_json(json_file, S3_BUCKET, S3_PATH_TGT_PYPDF)
+        # Chunk every file, embed all chunks in batched requests, then upload per file
+        records = {json_file: load_chunk_records(json_file, S3_BUCKET) for json_file in json_files}
+        all_records = [record for file_records in records.values() for record in file_records]
+        embeddings = embedder.embed([record["text"] for record in all_records])
+        for record, embedding in zip(all_records, embeddings):
+            record["embedding"] = embedding
+
+        with UpsertWriter(index, concurrency=PINECONE_UPSERT_CONCURRENCY) as writer:
+            for json_file, file_records in records.items():
+                vectors = [r for r in file_records if r["embedding"] is not None]
+                if not vectors:
+                    print(f"No embeddings created for {json_file}")
+                    continue
+                for r in vectors:
+                    writer.upsert(json_file, r["id"], r["embedding"], r["metadata"])
+                # Replace the single whole-document vector earlier versions stored under the file name
+                writer.delete(json_file, [json_file])
+        report = writer.report()
+        print(f"Uploaded {report['upserted']} chunk embeddings to Pinecone ({report['failed']} failed)")
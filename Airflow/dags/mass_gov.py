@@ -1,26 +1,39 @@
 import os
 import json
 import io
+import gzip
+import hashlib
+import re
+import tempfile
 import time
 import requests
 import pathlib
 import boto3
 import PyPDF2
 import openai
-import pinecone
 import pdfkit
 
 from airflow import DAG
 from airflow.operators.python import PythonOperator
-from datetime import datetime
+from datetime import datetime, timedelta
+from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from pinecone import Pinecone, ServerlessSpec
 from selenium import webdriver
+from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from bm25_index import POSTINGS_FILE, META_FILE, BM25Index, reciprocal_rank_fusion, term_frequencies, tokenize, write_index
+from chunking import chunk_document, chunk_id
+from batch_embedder import BatchEmbedder
+from embedding_cache import EmbeddingCache
+from pinecone_writer import UpsertWriter
+from scrape_manifest import ScrapeManifest, fetch_if_changed
+from token_budget import pack_context
 
 
 # Load environment variables
@@ -36,9 +49,52 @@ s3_folder = os.getenv('s3_folder', 'regulations/')
 S3_BUCKET = os.getenv("S3_BUCKET", bucket_name)
 S3_FOLDER_SRC = s3_folder
 S3_PATH_TGT_PYPDF = "parsed_pdfs/"
+# What was scraped and its ETag/Last-Modified/content hash; the search results are re-crawled
+# for new regulations every SCRAPE_FULL_CRAWL_DAYS, known PDFs are checked with conditional requests.
+SCRAPE_MANIFEST_KEY = os.getenv("SCRAPE_MANIFEST_KEY", "scrape/manifest.json")
+SCRAPE_FULL_CRAWL_DAYS = float(os.getenv("SCRAPE_FULL_CRAWL_DAYS", "7"))
 AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID", AWS_ACCESS_KEY_ID)
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", AWS_SECRET_ACCESS_KEY)
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "my-index")
+# Regulations are embedded and BM25-indexed as overlapping, section-bounded chunks with ids "<json key>#chunk-NNNN".
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+PINECONE_UPSERT_BATCH = 100
+PINECONE_UPSERT_CONCURRENCY = int(os.getenv("PINECONE_UPSERT_CONCURRENCY", "4"))
+EMBEDDING_MODEL = "text-embedding-ada-002"
+# Embeddings by content hash, and per source document the ids and hashes of its vectors
+# in Pinecone, so re-runs embed and upsert only what changed and delete what went away.
+EMBEDDING_CACHE_KEY = os.getenv("EMBEDDING_CACHE_KEY", "pinecone/embedding_cache.npz")
+VECTOR_MANIFEST_KEY = os.getenv("VECTOR_MANIFEST_KEY", "pinecone/vector_manifest.json.gz")
+LEGACY_CHUNK_HASHES_KEY = "pinecone/chunk_hashes.json.gz"
+# ada-002 takes up to 2048 inputs per request; a few requests run at once.
+EMBED_BATCH_MAX_INPUTS = int(os.getenv("EMBED_BATCH_MAX_INPUTS", "2048"))
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "100000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Rewritten after every embeddings run; the API clears its answer cache when it changes.
+INGEST_MARKER_KEY = os.getenv("INGEST_MARKER_KEY", "pinecone/ingest_version.json")
+# BM25 index read by the API, plus per-chunk term counts so reruns only re-tokenize changed files.
+BM25_S3_PREFIX = os.getenv("BM25_S3_PREFIX", "bm25/")
+BM25_DOC_TERMS_KEY = f"{BM25_S3_PREFIX}chunk_terms.json.gz"
+# Precomputed FAQ answers: curated questions plus the most frequent ones the API logged.
+FAQ_S3_PREFIX = os.getenv("FAQ_S3_PREFIX", "faq/")
+FAQ_POINTER_KEY = f"{FAQ_S3_PREFIX}latest.json"
+FAQ_QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regulation_faq.json")
+QUERY_LOG_S3_PREFIX = os.getenv("QUERY_LOG_S3_PREFIX", "query_logs/")
+QUERY_LOG_DAYS = int(os.getenv("QUERY_LOG_DAYS", "7"))
+QUERY_LOG_TOP_N = int(os.getenv("QUERY_LOG_TOP_N", "25"))
+QUERY_LOG_MIN_COUNT = int(os.getenv("QUERY_LOG_MIN_COUNT", "3"))
+# Retrieval settings, read from the same variables as the API's /ask: hybrid vector + BM25
+# candidates fused by RRF, then the cosine floor and context token budget.
+REGULATION_TOP_K = int(os.getenv("REGULATION_TOP_K", "5"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+CONTEXT_MIN_SCORE = float(os.getenv("CONTEXT_MIN_SCORE", "0.75"))
+# Same prompt the API's /ask uses, so precomputed answers read like live ones.
+REGULATION_SYSTEM_PROMPT = """
+                    You are an expert in Massachusetts food regulation laws. Respond strictly based on the provided context. Include regulation titles, codes, and user-friendly explanations.
+                """
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -51,6 +107,8 @@ session = boto3.Session(
     region_name='us-east-2'
 )
 s3 = session.client('s3')
+embedder = BatchEmbedder(model=EMBEDDING_MODEL, max_inputs=EMBED_BATCH_MAX_INPUTS, max_batch_tokens=EMBED_BATCH_MAX_TOKENS,
+                         concurrency=EMBED_CONCURRENCY)
 
 
 # Functions
@@ -69,7 +127,18 @@ def html_to_pdf_and_upload(html_content, file_name):
     pdf_buffer.seek(0)
     upload_file_to_s3(pdf_buffer, file_name)
 
-def scrape_upload_pdfs():
+def refresh_pdf(manifest, regulation_url, title, pdf_url):
+    entry = manifest.get(regulation_url) or {}
+    # Validators saved for a different PDF say nothing about this one.
+    content, validators = fetch_if_changed(pdf_url, entry if entry.get("pdf_url") == pdf_url else None)
+    file_name = f"{title.replace(' ', '_')}.pdf"
+    # Upload before recording, so a failed upload leaves the manifest describing the old copy.
+    if manifest.is_changed(regulation_url, content):
+        upload_file_to_s3(io.BytesIO(content), file_name)
+    return manifest.record(regulation_url, content, title=title, pdf_url=pdf_url,
+                           s3_key=f"{S3_FOLDER_SRC}{file_name}", **validators)
+
+def crawl_regulations(manifest, visited):
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -97,23 +166,29 @@ def scrape_upload_pdfs():
                 title = link.find_element(By.XPATH, ".//span").text.strip()
                 regulation_url = link.get_attribute("href")
 
+                # Known regulations are visited too: the page may now link to a different PDF.
                 print(f"Processing regulation: {title}")
                 driver.get(regulation_url)
                 time.sleep(2)
+                visited.add(regulation_url)
 
                 # Check for PDF download link
                 try:
                     pdf_link = driver.find_element(By.CSS_SELECTOR, "a.ma__download-link__file-link").get_attribute("href")
-                    response = requests.get(pdf_link, stream=True)
-                    if response.status_code == 200:
-                        pdf_buffer = io.BytesIO(response.content)
-                        upload_file_to_s3(pdf_buffer, f"{title.replace(' ', '_')}.pdf")
-                except:
+                except NoSuchElementException:
+                    pdf_link = None
+
+                if pdf_link:
+                    refresh_pdf(manifest, regulation_url, title, pdf_link)
+                else:
                     # Handle printable page
                     print(f"No downloadable PDF found for {title}, attempting to save the page as PDF.")
-                    page_html = driver.page_source
-                    html_to_pdf_and_upload(page_html, f"{title.replace(' ', '_')}_print.pdf")
-                    print(f"Saved and uploaded printable page for {title}")
+                    page_html = driver.page_source.encode('utf-8')
+                    file_name = f"{title.replace(' ', '_')}_print.pdf"
+                    if manifest.is_changed(regulation_url, page_html):
+                        html_to_pdf_and_upload(driver.page_source, file_name)
+                        manifest.record(regulation_url, page_html, title=title, s3_key=f"{S3_FOLDER_SRC}{file_name}")
+                        print(f"Saved and uploaded printable page for {title}")
 
                 driver.back()
                 time.sleep(3)
@@ -122,7 +197,32 @@ def scrape_upload_pdfs():
                 print(f"Error processing regulation: {e}")
 
     driver.quit()
-    print("Scraping completed.")
+
+def scrape_upload_pdfs():
+    manifest = ScrapeManifest(s3, S3_BUCKET, SCRAPE_MANIFEST_KEY).load()
+    visited = set()
+
+    if manifest.full_crawl_due(SCRAPE_FULL_CRAWL_DAYS):
+        crawl_regulations(manifest, visited)
+        manifest.mark_full_crawl()
+    else:
+        print(f"Search results crawled at {manifest.last_full_crawl}; only checking known regulations.")
+
+    # Every known PDF not fetched by the crawl above: a conditional HEAD, and a download only if it changed.
+    for regulation_url, entry in list(manifest.entries.items()):
+        if regulation_url in visited or not entry.get("pdf_url"):
+            continue
+        try:
+            if refresh_pdf(manifest, regulation_url, entry["title"], entry["pdf_url"]):
+                print(f"Updated {entry['title']}")
+        except requests.RequestException as e:
+            print(f"Error checking {entry['pdf_url']}: {e}")
+
+    manifest.save()
+    # Changed this run or left pending by an earlier failed extraction; pushed to XCom for extract_text_from_pdfs.
+    pending_keys = manifest.pending_keys()
+    print(f"Scraping completed: {len(pending_keys)} documents to extract.")
+    return pending_keys
 
 def list_pdfs_in_s3(bucket_name, folder):
     pdf_files = []
@@ -155,14 +255,29 @@ def extract_text_from_pdf_pypdf(pdf_file, bucket_name, s3_folder):
     )
     print(f"Extracted text uploaded as {json_filename} to {s3_folder}")
 
-def extract_text_from_pdfs():
-    pdf_files = list_pdfs_in_s3(S3_BUCKET, S3_FOLDER_SRC)
-    if not pdf_files:
-        print(f"No PDFs found in {S3_FOLDER_SRC}")
+def extract_text_from_pdfs(ti=None):
+    changed_keys = ti.xcom_pull(task_ids='scrape_upload_pdfs') if ti is not None else None
+    if changed_keys is not None:
+        # Only what the scrape task left pending; everything else already has its JSON.
+        pdf_files = [key for key in changed_keys if key.endswith('.pdf')]
+        print(f"{len(pdf_files)} new, changed or previously failed PDFs from scrape_upload_pdfs")
     else:
-        print(f"Found {len(pdf_files)} PDFs in {S3_FOLDER_SRC}")
+        pdf_files = list_pdfs_in_s3(S3_BUCKET, S3_FOLDER_SRC)
+        if not pdf_files:
+            print(f"No PDFs found in {S3_FOLDER_SRC}")
+        else:
+            print(f"Found {len(pdf_files)} PDFs in {S3_FOLDER_SRC}")
+    extracted = []
+    try:
         for pdf_file in pdf_files:
             extract_text_from_pdf_pypdf(pdf_file, S3_BUCKET, S3_PATH_TGT_PYPDF)
+            extracted.append(pdf_file)
+    finally:
+        # Whatever failed stays pending in the manifest and is handed back next run.
+        if extracted:
+            manifest = ScrapeManifest(s3, S3_BUCKET, SCRAPE_MANIFEST_KEY).load()
+            manifest.mark_extracted(extracted)
+            manifest.save()
 
 def list_json_files_in_s3(bucket_name, folder):
     json_files = []
@@ -172,80 +287,303 @@ def list_json_files_in_s3(bucket_name, folder):
             json_files.append(obj['Key'])
     return json_files
 
-def split_text(text, max_tokens=8192):
-    tokens = text.split()
-    return [tokens[i:i + max_tokens] for i in range(0, len(tokens), max_tokens)]
-
-def create_embeddings_from_json(pdf_file, bucket_name, s3_folder, index):
-    print(f"Processing {pdf_file}...")
-    # Download JSON
-    json_obj = s3.get_object(Bucket=bucket_name, Key=pdf_file)
-    json_content = json_obj['Body'].read().decode('utf-8')
-
-    parsed_data = json.loads(json_content)
-    extracted_text = parsed_data.get('content', "")
+def load_document_text(json_key, bucket_name):
+    json_obj = s3.get_object(Bucket=bucket_name, Key=json_key)
+    return json.loads(json_obj['Body'].read().decode('utf-8')).get('content', "")
+
+def document_chunks(json_key, text):
+    chunks = chunk_document(text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS)
+    return [(chunk_id(json_key, n), chunk) for n, chunk in enumerate(chunks)]
+
+def chunk_metadata(json_key, n, chunk):
+    return {
+        "pdf_file": json_key,
+        "content": chunk["text"],
+        "section": chunk["section"],
+        "chunk_index": n,
+        "start_char": chunk["start"],
+        "end_char": chunk["end"],
+    }
 
+def load_chunk_records(pdf_file, bucket_name):
+    extracted_text = load_document_text(pdf_file, bucket_name)
     if not extracted_text:
         print(f"No content found in {pdf_file}")
-        return
-
-    # Truncate text
-    extracted_text = extracted_text[:8192]
-    text_chunks = split_text(extracted_text)
-
-    embeddings = []
-    for chunk in text_chunks:
-        try:
-            response = openai.Embedding.create(
-                model="text-embedding-ada-002",
-                input=" ".join(chunk)
-            )
-            embeddings.append(response.data[0].embedding)
-        except Exception as e:
-            print(f"Error creating embeddings for {pdf_file}: {e}")
-            continue
-
-    if not embeddings:
-        print(f"No embeddings created for {pdf_file}")
-        return
-
-    # Flatten embeddings
-    # Note: `response.data[0].embedding` is already a single vector, we concatenated multiple chunks.
-    # Pinecone expects one vector per ID. If we want multiple vectors per file, we must store multiple IDs.
-    # For simplicity, we'll just take the first embedding or average them.
-    # Here let's average all embeddings (if multiple chunks):
-    import numpy as np
-    all_embeddings = np.array(embeddings)
-    final_embedding = np.mean(all_embeddings, axis=0).tolist()
-
-    metadata = {
-        "pdf_file": pdf_file,
-        "content": extracted_text[:500]
-    }
-
-    # Upsert to pinecone
-    index.upsert(vectors=[(pdf_file, final_embedding, metadata)])
-    print(f"Uploaded embedding for {pdf_file} to Pinecone")
-
-def create_embeddings():
-    # Initialize Pinecone
-    pinecone.init(api_key=os.getenv("PINECONE_API_KEY"), environment="us-east-1-aws")
+        return []
+    return [
+        {"id": vector_id, "pdf_file": pdf_file, "text": chunk["text"], "metadata": chunk_metadata(pdf_file, n, chunk)}
+        for n, (vector_id, chunk) in enumerate(document_chunks(pdf_file, extracted_text))
+    ]
+
+def get_pinecone_index():
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
     # Create index if not exists
-    if PINECONE_INDEX_NAME not in pinecone.list_indexes():
-        pinecone.create_index(
+    if PINECONE_INDEX_NAME not in pc.list_indexes().names():
+        pc.create_index(
             name=PINECONE_INDEX_NAME,
             dimension=1536,
-            metric='cosine'
+            metric='cosine',
+            spec=ServerlessSpec(cloud='aws', region='us-east-1'),
         )
-    index = pinecone.Index(PINECONE_INDEX_NAME)
+    return pc.Index(PINECONE_INDEX_NAME)
+
+def load_embedding_state(directory):
+    cache = EmbeddingCache(EMBEDDING_MODEL)
+    cache_path = os.path.join(directory, "embedding_cache.npz")
+    try:
+        s3.download_file(S3_BUCKET, EMBEDDING_CACHE_KEY, cache_path)
+        cache.load(cache_path)
+    except ClientError as e:
+        print(f"No embedding cache at s3://{S3_BUCKET}/{EMBEDDING_CACHE_KEY}: {e}")
+    try:
+        obj = s3.get_object(Bucket=S3_BUCKET, Key=VECTOR_MANIFEST_KEY)
+        manifest = json.loads(gzip.decompress(obj['Body'].read()).decode('utf-8'))
+    except s3.exceptions.NoSuchKey:
+        manifest = load_legacy_chunk_hashes()
+    return cache, manifest
+
+def load_legacy_chunk_hashes():
+    # Earlier runs kept one flat {vector_id: hash} map; group it by source document.
+    try:
+        obj = s3.get_object(Bucket=S3_BUCKET, Key=LEGACY_CHUNK_HASHES_KEY)
+    except s3.exceptions.NoSuchKey:
+        return {}
+    manifest = {}
+    for vector_id, content_hash in json.loads(gzip.decompress(obj['Body'].read()).decode('utf-8')).items():
+        manifest.setdefault(vector_id.split("#chunk-")[0], {})[vector_id] = content_hash
+    return manifest
+
+def save_embedding_state(directory, cache, manifest):
+    cache_path = os.path.join(directory, "embedding_cache.npz")
+    cache.save(cache_path)
+    s3.upload_file(cache_path, S3_BUCKET, EMBEDDING_CACHE_KEY)
+    s3.put_object(Bucket=S3_BUCKET, Key=VECTOR_MANIFEST_KEY,
+                  Body=gzip.compress(json.dumps(manifest).encode('utf-8')))
+
+def chunk_hash(cache, record):
+    # Text and metadata: a chunk whose offsets or section moved is re-upserted (from the cache).
+    return hashlib.sha256(cache.key(record["text"]) + json.dumps(record["metadata"], sort_keys=True).encode('utf-8')).hexdigest()
+
+def create_embeddings():
+    index = get_pinecone_index()
 
     json_files = list_json_files_in_s3(S3_BUCKET, S3_PATH_TGT_PYPDF)
     if not json_files:
+        # Also guards against deleting every vector because of an empty listing.
         print(f"No JSON files found in {S3_PATH_TGT_PYPDF}")
-    else:
-        print(f"Found {len(json_files)} JSON files in {S3_PATH_TGT_PYPDF}")
-        for json_file in json_files:
-            create_embeddings_from_json(json_file, S3_BUCKET, S3_PATH_TGT_PYPDF, index)
+        return
+    print(f"Found {len(json_files)} JSON files in {S3_PATH_TGT_PYPDF}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache, manifest = load_embedding_state(directory)
+        records = {json_file: load_chunk_records(json_file, S3_BUCKET) for json_file in json_files}
+        all_records = [record for file_records in records.values() for record in file_records]
+        for json_file in records:
+            # Documents not yet in the manifest may still have the single averaged vector
+            # earlier versions stored under the bare key; listing it gets it deleted below.
+            manifest.setdefault(json_file, {json_file: None})
+
+        # Chunks upserted by an earlier run with the same text and metadata are skipped entirely;
+        # changed ones come from the cache when their text has been embedded before.
+        to_upsert, to_embed, unchanged = [], [], 0
+        for record in all_records:
+            record["hash"] = chunk_hash(cache, record)
+            if manifest[record["pdf_file"]].get(record["id"]) == record["hash"]:
+                cache.touch(record["text"])
+                unchanged += 1
+                continue
+            record["embedding"] = cache.get(record["text"])
+            to_upsert.append(record)
+            if record["embedding"] is None:
+                to_embed.append(record)
+        print(f"Chunks: {len(all_records)} total, {unchanged} unchanged, "
+              f"{len(to_upsert) - len(to_embed)} from cache, {len(to_embed)} to embed")
+
+        # One pass over every new chunk in the corpus, so requests are packed full across files.
+        embeddings = embedder.embed([record["text"] for record in to_embed])
+        for record, embedding in zip(to_embed, embeddings):
+            record["embedding"] = embedding
+            if embedding is not None:
+                cache.put(record["text"], embedding)
+        if len(embeddings) - embeddings.count(None) < len(to_embed):
+            print(f"{embeddings.count(None)} chunks were not embedded; they are retried on the next run")
+
+        with UpsertWriter(index, manifest, max_batch_vectors=PINECONE_UPSERT_BATCH,
+                          concurrency=PINECONE_UPSERT_CONCURRENCY) as writer:
+            for record in to_upsert:
+                if record["embedding"] is not None:
+                    writer.upsert(record["pdf_file"], record["id"], record["embedding"], record["metadata"],
+                                  record["hash"])
+            # Chunks that disappeared because a document shrank or was removed.
+            for json_file in list(manifest):
+                writer.sync_document(json_file, [r["id"] for r in records.get(json_file, [])])
+        report = writer.report()
+        print(f"Pinecone: upserted {report['upserted']}, deleted {report['deleted']}, failed {report['failed']} "
+              f"in {report['requests']} requests ({report['retries']} retries); "
+              f"cache: {cache.hits} hits, {cache.misses} misses")
+
+        save_embedding_state(directory, cache, manifest)
+
+    if not report['upserted'] and not report['deleted']:
+        # Leave the marker alone so the API keeps its answer cache.
+        return
+    marker = {"ingested_at": datetime.utcnow().isoformat(), "files": len(json_files),
+              "upserted": report['upserted'], "deleted": report['deleted']}
+    s3.put_object(Bucket=S3_BUCKET, Key=INGEST_MARKER_KEY, Body=json.dumps(marker), ContentType="application/json")
+    print(f"Wrote ingest marker s3://{S3_BUCKET}/{INGEST_MARKER_KEY}")
+
+def load_bm25_doc_terms():
+    try:
+        obj = s3.get_object(Bucket=S3_BUCKET, Key=BM25_DOC_TERMS_KEY)
+    except s3.exceptions.NoSuchKey:
+        return {}
+    return json.loads(gzip.decompress(obj['Body'].read()).decode('utf-8'))
+
+def build_bm25_index():
+    doc_terms = load_bm25_doc_terms()
+    etags = {}
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=S3_PATH_TGT_PYPDF):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith('.json'):
+                etags[obj['Key']] = obj['ETag']
+
+    removed = [key for key in doc_terms if key not in etags]
+    for key in removed:
+        del doc_terms[key]
+    changed = [key for key, etag in etags.items() if doc_terms.get(key, {}).get("etag") != etag]
+    print(f"BM25: {len(changed)} new or changed, {len(removed)} removed, {len(etags) - len(changed)} unchanged")
+    if not changed and not removed:
+        return
+
+    for key in changed:
+        content = load_document_text(key, S3_BUCKET)
+        doc_terms[key] = {
+            "etag": etags[key],
+            # Same chunk ids as the Pinecone vectors, so the API can fuse the two rankings.
+            "chunks": {
+                vector_id: {
+                    "tf": term_frequencies(chunk["text"]),
+                    "length": len(tokenize(chunk["text"])),
+                    "snippet": chunk["text"],
+                }
+                for vector_id, chunk in document_chunks(key, content)
+            },
+        }
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_index(directory, {vector_id: entry for doc in doc_terms.values() for vector_id, entry in doc["chunks"].items()})
+        # Header last: the API downloads when the header's ETag changes.
+        s3.upload_file(os.path.join(directory, POSTINGS_FILE), S3_BUCKET, f"{BM25_S3_PREFIX}{POSTINGS_FILE}")
+        s3.upload_file(os.path.join(directory, META_FILE), S3_BUCKET, f"{BM25_S3_PREFIX}{META_FILE}")
+    s3.put_object(Bucket=S3_BUCKET, Key=BM25_DOC_TERMS_KEY,
+                  Body=gzip.compress(json.dumps(doc_terms).encode('utf-8')))
+    print(f"Uploaded BM25 index over {sum(len(doc['chunks']) for doc in doc_terms.values())} chunks from {len(doc_terms)} documents to s3://{S3_BUCKET}/{BM25_S3_PREFIX}")
+
+def normalize_question(text):
+    # Matches normalize_text in the API's embedding cache, which keys the query log.
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def top_logged_questions():
+    totals = {}
+    paginator = s3.get_paginator('list_objects_v2')
+    today = datetime.utcnow().date()
+    for days_back in range(QUERY_LOG_DAYS):
+        prefix = f"{QUERY_LOG_S3_PREFIX}{today - timedelta(days=days_back):%Y-%m-%d}/"
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                counts = json.loads(s3.get_object(Bucket=S3_BUCKET, Key=obj['Key'])['Body'].read())["counts"]
+                for key, entry in counts.items():
+                    total = totals.setdefault(key, {"question": entry["question"], "count": 0})
+                    total["count"] += entry["count"]
+    frequent = [t for t in totals.values() if t["count"] >= QUERY_LOG_MIN_COUNT]
+    frequent.sort(key=lambda t: t["count"], reverse=True)
+    return [t["question"] for t in frequent[:QUERY_LOG_TOP_N]]
+
+def load_bm25_index(directory):
+    try:
+        s3.download_file(S3_BUCKET, f"{BM25_S3_PREFIX}{META_FILE}", os.path.join(directory, META_FILE))
+        s3.download_file(S3_BUCKET, f"{BM25_S3_PREFIX}{POSTINGS_FILE}", os.path.join(directory, POSTINGS_FILE))
+    except ClientError as e:
+        print(f"No BM25 index at s3://{S3_BUCKET}/{BM25_S3_PREFIX} ({e}); FAQ retrieval is vector-only")
+        return None
+    return BM25Index(directory)
+
+def faq_matches(index, bm25, embedding, question):
+    # Mirrors the API's query_candidate_matches; the cross-encoder reranker only runs in the API.
+    vector_matches = index.query(vector=embedding, top_k=max(REGULATION_TOP_K, HYBRID_CANDIDATES),
+                                 include_metadata=True).get('matches', [])
+    lexical_matches = bm25.search(question, max(REGULATION_TOP_K, HYBRID_CANDIDATES)) if bm25 is not None else []
+    if not lexical_matches:
+        return vector_matches[:REGULATION_TOP_K]
+    by_id = {m['id']: m for m in vector_matches}
+    fused = reciprocal_rank_fusion([[m['id'] for m in vector_matches], [doc_id for doc_id, _ in lexical_matches]],
+                                   k=HYBRID_RRF_K, limit=REGULATION_TOP_K)
+    matches = []
+    for doc_id, score in fused:
+        if doc_id in by_id:
+            matches.append({"id": doc_id, "score": score, "vector_score": by_id[doc_id]['score'],
+                            "metadata": by_id[doc_id]['metadata']})
+        else:
+            matches.append({"id": doc_id, "score": score, "lexical_only": True,
+                            "metadata": {"content": bm25.snippets.get(doc_id, "")}})
+    return matches
+
+def answer_faq_question(index, bm25, question, embedding):
+    try:
+        chunks, context_ids, _ = pack_context(faq_matches(index, bm25, embedding, question),
+                                              budget_tokens=CONTEXT_TOKEN_BUDGET, min_score=CONTEXT_MIN_SCORE)
+        if not chunks:
+            print(f"No context found for FAQ question: {question}")
+            return None
+        combined_context = " ".join(chunks)
+        completion = openai.ChatCompletion.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": REGULATION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Context: {combined_context}\n\n{question}"},
+            ],
+        )
+    except Exception as e:
+        print(f"Error answering FAQ question {question!r}: {e}")
+        return None
+    return {
+        "question": question,
+        "embedding": embedding,
+        "answer": completion['choices'][0]['message']['content'],
+        "context_ids": context_ids,
+    }
+
+def build_faq_answers():
+    with open(FAQ_QUESTIONS_PATH) as f:
+        curated = json.load(f)
+    logged = top_logged_questions()
+    questions = list({normalize_question(q): q.strip() for q in logged + curated}.values())
+    print(f"FAQ: {len(curated)} curated and {len(logged)} logged questions, {len(questions)} distinct")
+    if not questions:
+        # Keep the published artifact rather than replacing it with an empty one.
+        return
+
+    index = get_pinecone_index()
+    response = openai.Embedding.create(model="text-embedding-ada-002", input=questions)
+    embeddings = [item['embedding'] for item in sorted(response['data'], key=lambda item: item['index'])]
+
+    entries = []
+    with tempfile.TemporaryDirectory() as directory:
+        bm25 = load_bm25_index(directory)
+        for question, embedding in zip(questions, embeddings):
+            entry = answer_faq_question(index, bm25, question, embedding)
+            if entry is not None:
+                entries.append(entry)
+
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    key = f"{FAQ_S3_PREFIX}faq_answers_{version}.json.gz"
+    artifact = {"version": version, "generated_at": datetime.utcnow().isoformat(), "entries": entries}
+    s3.put_object(Bucket=S3_BUCKET, Key=key, Body=gzip.compress(json.dumps(artifact).encode('utf-8')))
+    # Point the API at the new version only once the artifact is fully written.
+    s3.put_object(Bucket=S3_BUCKET, Key=FAQ_POINTER_KEY, ContentType="application/json",
+                  Body=json.dumps({"version": version, "key": key, "entries": len(entries)}))
+    print(f"Published {len(entries)} FAQ answers to s3://{S3_BUCKET}/{key}")
 
 
 # Define the DAG and Tasks
@@ -278,4 +616,15 @@ with DAG(
         python_callable=create_embeddings
     )
 
-    t1 >> t2 >> t3
+    t4 = PythonOperator(
+        task_id='build_bm25_index',
+        python_callable=build_bm25_index
+    )
+
+    t5 = PythonOperator(
+        task_id='build_faq_answers',
+        python_callable=build_faq_answers
+    )
+
+    t1 >> t2 >> [t3, t4]
+    [t3, t4] >> t5
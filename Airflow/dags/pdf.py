@@ -13,6 +13,7 @@ import time
 from dotenv import load_dotenv
 import pathlib
 import os
+from scrape_manifest import ScrapeManifest, fetch_if_changed
 
 env_path = pathlib.Path('/opt/airflow/.env')
 load_dotenv(dotenv_path=env_path)
@@ -27,6 +28,10 @@ s3 = boto3.client(
 bucket_name = os.getenv('bucket_name')
 s3_folder = os.getenv('s3_folder')
 
+# Same manifest as the mass_gov DAG: known PDFs are only re-downloaded when the server reports a change
+manifest = ScrapeManifest(s3, bucket_name, os.getenv("SCRAPE_MANIFEST_KEY", "scrape/manifest.json")).load()
+visited = set()
+
 # Step 1: Set up Selenium WebDriver
 chrome_options = Options()
 chrome_options.add_argument("--headless")
@@ -44,8 +49,10 @@ def upload_file_to_s3(file_obj, file_name):
     try:
         s3.upload_fileobj(file_obj, bucket_name, f"{s3_folder}{file_name}")
         print(f"Uploaded to s3://{bucket_name}/{s3_folder}{file_name}")
+        return True
     except Exception as e:
         print(f"Failed to upload to S3: {e}")
+        return False
 
 def html_to_pdf_and_upload(html_content, file_name):
     try:
@@ -56,9 +63,23 @@ def html_to_pdf_and_upload(html_content, file_name):
         with open(temp_pdf_file, 'rb') as temp_file:
             pdf_buffer.write(temp_file.read())
         pdf_buffer.seek(0)  # Reset buffer position
-        upload_file_to_s3(pdf_buffer, file_name)
+        return upload_file_to_s3(pdf_buffer, file_name)
     except Exception as e:
         print(f"Failed to convert HTML to PDF for {file_name}: {e}")
+        return False
+
+def refresh_pdf(regulation_url, title, pdf_link):
+    entry = manifest.get(regulation_url) or {}
+    content, validators = fetch_if_changed(pdf_link, entry if entry.get("pdf_url") == pdf_link else None)
+    file_name = f"{title.replace(' ', '_')}.pdf"
+    # Upload before recording; the entry stays pending until the mass_gov DAG extracts its text
+    if manifest.is_changed(regulation_url, content):
+        if not upload_file_to_s3(io.BytesIO(content), file_name):
+            return
+    else:
+        print(f"{title} is unchanged")
+    manifest.record(regulation_url, content, title=title, pdf_url=pdf_link,
+                    s3_key=f"{s3_folder}{file_name}", **validators)
 
 # Loop through pages and process regulations
 for page_number in range(1, total_pages * page_increment + 1, page_increment):
@@ -81,24 +102,34 @@ for page_number in range(1, total_pages * page_increment + 1, page_increment):
                 title = link.find_element(By.XPATH, ".//span").text.strip()
                 regulation_url = link.get_attribute("href")
 
+                # Known regulations are visited too, in case the page now links to a different PDF
                 print(f"Processing regulation: {title}")
                 driver.get(regulation_url)
                 time.sleep(2)
+                visited.add(regulation_url)
 
                 # Check for PDF download link
                 try:
                     pdf_link = driver.find_element(By.CSS_SELECTOR, "a.ma__download-link__file-link").get_attribute("href")
-                    response = requests.get(pdf_link, stream=True)
-                    if response.status_code == 200:
-                        pdf_buffer = io.BytesIO(response.content)
-                        upload_file_to_s3(pdf_buffer, f"{title.replace(' ', '_')}.pdf")
-                except:
+                except Exception:
+                    pdf_link = None
+
+                if pdf_link:
+                    try:
+                        refresh_pdf(regulation_url, title, pdf_link)
+                    except requests.RequestException as e:
+                        print(f"Failed to download PDF for {title}: {e}")
+                else:
                     try:
                         print(f"No downloadable PDF found for {title}, attempting to save the page as PDF.")
                         # Get the current page's HTML
                         page_html = driver.page_source
-                        html_to_pdf_and_upload(page_html, f"{title.replace(' ', '_')}_print.pdf")
-                        print(f"Saved and uploaded printable page for {title}")
+                        file_name = f"{title.replace(' ', '_')}_print.pdf"
+                        if manifest.is_changed(regulation_url, page_html.encode('utf-8')):
+                            if html_to_pdf_and_upload(page_html, file_name):
+                                manifest.record(regulation_url, page_html.encode('utf-8'), title=title,
+                                                s3_key=f"{s3_folder}{file_name}")
+                                print(f"Saved and uploaded printable page for {title}")
                     except Exception as e:
                         print(f"Failed to save printable page for {title}: {e}")
 
@@ -114,4 +145,16 @@ for page_number in range(1, total_pages * page_increment + 1, page_increment):
 
 # Close the browser
 driver.quit()
+
+# Known PDFs not fetched above: a conditional HEAD each, downloading only what changed
+for regulation_url, entry in list(manifest.entries.items()):
+    if regulation_url in visited or not entry.get("pdf_url"):
+        continue
+    try:
+        refresh_pdf(regulation_url, entry["title"], entry["pdf_url"])
+    except requests.RequestException as e:
+        print(f"Failed to check {entry['pdf_url']}: {e}")
+
+manifest.mark_full_crawl()
+manifest.save()
 print("Scraping completed.")
@@ -0,0 +1,148 @@
+# Buffered Pinecone writer for the regulation pipeline: packs vectors into size-bounded
+# upsert batches sent over parallel connections, retries transient failures, and keeps a
+# manifest of the vector ids (and content hashes) each source document has in the index.
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib3.exceptions import MaxRetryError, ProtocolError, TimeoutError as Urllib3TimeoutError
+
+# Pinecone rejects upsert requests over 2 MB and delete requests over 1000 ids.
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+MAX_DELETE_IDS = 1000
+# Errors from the HTTP layer, before Pinecone answered; anything else without a status is a bug, not a blip.
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, MaxRetryError, ProtocolError, Urllib3TimeoutError)
+
+
+def estimate_vector_bytes(vector_id, values, metadata):
+    # JSON floats take up to ~20 characters each.
+    return len(vector_id) + 20 * len(values) + len(json.dumps(metadata)) + 64
+
+
+def is_retryable(error):
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class UpsertWriter:
+    """
+    Collects vectors with `upsert` and sends them in batches of at most
+    `max_batch_vectors` vectors and `max_batch_bytes` estimated request size, with
+    up to `concurrency` requests in flight. Failed requests are retried with
+    exponential backoff when they failed in transit or Pinecone answered 429 or 5xx.
+
+    `manifest` maps each source document to {vector_id: content_hash} for what
+    the index holds; it is updated only once a request succeeds. `sync_document`
+    and `remove_document` delete ids a document no longer has.
+    """
+
+    def __init__(self, index, manifest=None, max_batch_vectors=100, max_batch_bytes=int(MAX_REQUEST_BYTES * 0.9),
+                 concurrency=4, max_retries=5, max_backoff_seconds=30):
+        self.index = index
+        self.manifest = manifest if manifest is not None else {}
+        self.max_batch_vectors = max_batch_vectors
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+        self.max_backoff_seconds = max_backoff_seconds
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pinecone-upsert")
+        self._futures = []
+        self._lock = threading.Lock()
+        self._batch, self._batch_bytes = [], 0
+        self._counters = {"upserted": 0, "deleted": 0, "requests": 0, "retries": 0, "failed": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _call(self, description, fn, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            try:
+                return fn(**kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                self._count("retries")
+                print(f"Pinecone {description} failed ({e}); retrying")
+                time.sleep(min(self.max_backoff_seconds, 2 ** attempt))
+
+    def _send_upsert(self, batch):
+        try:
+            self._call("upsert", self.index.upsert, vectors=[(vector_id, values, metadata)
+                                                             for _, vector_id, values, metadata, _ in batch])
+        except Exception as e:
+            print(f"Giving up on upserting {len(batch)} vectors: {e}")
+            self._count("failed", len(batch))
+            return
+        with self._lock:
+            for document, vector_id, _, _, content_hash in batch:
+                self.manifest.setdefault(document, {})[vector_id] = content_hash
+            self._counters["upserted"] += len(batch)
+
+    def _send_delete(self, document, ids):
+        try:
+            self._call("delete", self.index.delete, ids=ids)
+        except Exception as e:
+            print(f"Giving up on deleting {len(ids)} vectors of {document}: {e}")
+            self._count("failed", len(ids))
+            return
+        with self._lock:
+            entries = self.manifest.get(document, {})
+            for vector_id in ids:
+                entries.pop(vector_id, None)
+            if not entries:
+                self.manifest.pop(document, None)
+            self._counters["deleted"] += len(ids)
+
+    def _submit_batch(self):
+        if self._batch:
+            self._futures.append(self._pool.submit(self._send_upsert, self._batch))
+            self._batch, self._batch_bytes = [], 0
+
+    def upsert(self, document, vector_id, values, metadata, content_hash=None):
+        size = estimate_vector_bytes(vector_id, values, metadata)
+        if self._batch and (len(self._batch) >= self.max_batch_vectors or self._batch_bytes + size > self.max_batch_bytes):
+            self._submit_batch()
+        self._batch.append((document, vector_id, values, metadata, content_hash))
+        self._batch_bytes += size
+
+    def delete(self, document, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), MAX_DELETE_IDS):
+            self._futures.append(self._pool.submit(self._send_delete, document, ids[start:start + MAX_DELETE_IDS]))
+
+    def sync_document(self, document, vector_ids):
+        """Deletes the ids the manifest lists for `document` that are not in `vector_ids`."""
+        keep = set(vector_ids)
+        with self._lock:
+            stale = [vector_id for vector_id in self.manifest.get(document, {}) if vector_id not in keep]
+        if stale:
+            self.delete(document, stale)
+        return len(stale)
+
+    def remove_document(self, document):
+        return self.sync_document(document, ())
+
+    def flush(self):
+        self._submit_batch()
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown()
+
+    def report(self):
+        with self._lock:
+            return dict(self._counters)
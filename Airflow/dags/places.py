@@ -12,6 +12,8 @@ import re
 from io import BytesIO
 import snowflake.connector
 import urllib.parse
+# Shared with the FastAPI service; mounted into the Airflow plugins folder by docker-compose.
+from rate_limiter import QuotaGovernor, QuotaExceeded
 
 # Load environment variables
 
@@ -39,6 +41,8 @@ S3_BUCKET_NAME = os.getenv('AWS_BUCKET_NAME')
 S3_FILE_PATH = os.getenv('S3_FILE_PATH')
 S3_FILE_NAME = 'data/massachusetts_restaurants.csv'
 SNOWFLAKE_TABLE = 'restaurant_details'
+PLACES_NEARBY_QPS = float(os.getenv('PLACES_NEARBY_QPS', '10'))
+PLACES_DAILY_QUOTA = int(os.getenv('PLACES_DAILY_QUOTA', '0'))
 
 
 # Define Default Arguments
@@ -82,6 +86,9 @@ def extract_restaurant_data(**kwargs):
     grid_points = generate_grid(MIN_LAT, MAX_LAT, MIN_LNG, MAX_LNG, GRID_STEP)
     print(f"Generated {len(grid_points)} grid points for Massachusetts.")
 
+    # Paces nearby searches just under the allowed QPS and backs off when Google throttles.
+    governor = QuotaGovernor({'nearbysearch': PLACES_NEARBY_QPS}, daily_quota=PLACES_DAILY_QUOTA)
+
     def fetch_restaurants(lat, lng, radius=1500, type='restaurant', keyword=None):
         url = 'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
         params = {
@@ -94,13 +101,21 @@ def extract_restaurant_data(**kwargs):
             params['keyword'] = keyword
 
         restaurants = []
+        throttled_retries = 0
         while True:
+            governor.acquire('nearbysearch')
             response = requests.get(url, params=params)
             if response.status_code != 200:
+                governor.report('nearbysearch', response.status_code)
                 print(f"Error: {response.status_code} for location ({lat}, {lng})")
                 break
 
             data = response.json()
+            governor.report('nearbysearch', data.get('status'))
+            if data.get('status') == 'OVER_QUERY_LIMIT' and throttled_retries < 5:
+                # The governor has already slowed down; retry the same page.
+                throttled_retries += 1
+                continue
             if data.get('status') not in ['OK', 'ZERO_RESULTS']:
                 print(f"API Error: {data.get('status')} for location ({lat}, {lng})")
                 break
@@ -151,8 +166,9 @@ def extract_restaurant_data(**kwargs):
                         'types': place.get('types')
                     }
                     restaurants_list.append(restaurant)
-            # Respect API rate limits
-            time.sleep(1)
+        except QuotaExceeded as e:
+            print(f"Stopping extraction at grid point {idx + 1}: {e}")
+            break
         except Exception as e:
             print(f"Exception occurred: {e}")
             continue
@@ -160,6 +176,7 @@ def extract_restaurant_data(**kwargs):
     # Create DataFrame
     restaurants_df = pd.DataFrame(restaurants_list)
     print(f"Total unique restaurants fetched: {len(restaurants_df)}")
+    print(f"Places API usage: {governor.stats()}")
 
     # Save DataFrame to local CSV
     try:
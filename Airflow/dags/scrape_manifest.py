@@ -0,0 +1,134 @@
+# Manifest of scraped regulations, shared by mass_gov.py and pdf.py: for each regulation
+# page, the PDF it links to, the S3 key it was uploaded to, the server's ETag/Last-Modified
+# and a SHA-256 of the content, so later runs ask the server whether anything changed
+# instead of re-crawling and re-uploading every document.
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import requests
+from botocore.exceptions import ClientError
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def response_validators(response):
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def fetch_if_changed(url, entry=None, timeout=60):
+    """
+    Returns (content, validators) for `url`, or (None, validators) when the
+    server confirms the copy described by `entry` is current: a conditional HEAD
+    answered with 304, or with the same ETag/Last-Modified. Only otherwise is
+    the document downloaded.
+    """
+    entry = entry or {}
+    headers = conditional_headers(entry)
+    if headers:
+        head = requests.head(url, headers=headers, allow_redirects=True, timeout=timeout)
+        if head.status_code == 304:
+            return None, {"etag": entry.get("etag"), "last_modified": entry.get("last_modified")}
+        validators = response_validators(head)
+        if head.ok and any(validators.values()) and \
+                all(validators[name] == entry.get(name) for name in validators if validators[name]):
+            return None, validators
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content, response_validators(response)
+
+
+class ScrapeManifest:
+    """
+    {regulation_url: {"title", "regulation_url", "pdf_url", "s3_key", "etag",
+    "last_modified", "content_hash", "checked_at", "changed_at", "pending"}} stored
+    as JSON at s3://`bucket`/`key`, plus when the search results were last fully
+    crawled. "pending" marks an uploaded change whose text has not been extracted
+    yet; it stays set, and the key is handed to extraction again, until
+    `mark_extracted` clears it.
+    """
+
+    def __init__(self, s3, bucket, key):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.entries = {}
+        self.last_full_crawl = None
+
+    def load(self):
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                raise
+            print(f"No scrape manifest at s3://{self.bucket}/{self.key}; crawling everything")
+            return self
+        data = json.loads(obj["Body"].read().decode("utf-8"))
+        self.entries = data.get("entries", {})
+        self.last_full_crawl = data.get("last_full_crawl")
+        print(f"Loaded scrape manifest with {len(self.entries)} regulations")
+        return self
+
+    def save(self):
+        body = json.dumps({"last_full_crawl": self.last_full_crawl, "entries": self.entries}, indent=1)
+        self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=body, ContentType="application/json")
+        print(f"Saved scrape manifest with {len(self.entries)} regulations to s3://{self.bucket}/{self.key}")
+
+    def full_crawl_due(self, max_age_days):
+        if not self.entries or not self.last_full_crawl:
+            return True
+        return datetime.utcnow() - datetime.fromisoformat(self.last_full_crawl) >= timedelta(days=max_age_days)
+
+    def mark_full_crawl(self):
+        self.last_full_crawl = datetime.utcnow().isoformat()
+
+    def get(self, regulation_url):
+        return self.entries.get(regulation_url)
+
+    def is_changed(self, regulation_url, content):
+        entry = self.entries.get(regulation_url) or {}
+        return content is not None and content_hash(content) != entry.get("content_hash")
+
+    def record(self, regulation_url, content=None, **fields):
+        """
+        Updates the entry for `regulation_url`; with `content`, also compares its
+        hash to the stored one. Returns True, and marks the entry pending, when the
+        content is new or changed. Call it only once the content is uploaded.
+        """
+        now = datetime.utcnow().isoformat()
+        entry = self.entries.setdefault(regulation_url, {"regulation_url": regulation_url})
+        entry.update({name: value for name, value in fields.items() if value is not None})
+        entry["checked_at"] = now
+        if content is None:
+            return False
+        digest = content_hash(content)
+        if digest == entry.get("content_hash"):
+            return False
+        entry["content_hash"] = digest
+        entry["changed_at"] = now
+        entry["pending"] = True
+        return True
+
+    def pending_keys(self):
+        return [entry["s3_key"] for entry in self.entries.values() if entry.get("pending") and entry.get("s3_key")]
+
+    def mark_extracted(self, s3_keys):
+        s3_keys = set(s3_keys)
+        for entry in self.entries.values():
+            if entry.get("s3_key") in s3_keys:
+                entry.pop("pending", None)
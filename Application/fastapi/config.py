@@ -21,4 +21,71 @@ class Config:
     DATABASE_URL=os.getenv('DATABASE_URL')
     SECRET_KEY=os.getenv('SECRET_KEY')
     TAVILY_API_KEY=os.getenv('TAVILY_API_KEY')
+    HTTP_CONNECT_TIMEOUT=float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT=float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+    HTTP_POOL_MAXSIZE=int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+    HTTP2_ENABLED=os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+    PLACES_NEARBY_QPS=float(os.getenv('PLACES_NEARBY_QPS', '10'))
+    PLACES_DETAILS_QPS=float(os.getenv('PLACES_DETAILS_QPS', '25'))
+    PLACES_DAILY_QUOTA=int(os.getenv('PLACES_DAILY_QUOTA', '0'))
+    PLACES_ACQUIRE_TIMEOUT=float(os.getenv('PLACES_ACQUIRE_TIMEOUT', '10'))
+    PLACE_DETAILS_CONCURRENT=os.getenv('PLACE_DETAILS_CONCURRENT', 'true').lower() == 'true'
+    PLACE_DETAILS_MAX_WORKERS=int(os.getenv('PLACE_DETAILS_MAX_WORKERS', '8'))
+    PLACE_DETAILS_TIMEOUT=float(os.getenv('PLACE_DETAILS_TIMEOUT', '5'))
+    PLACE_DETAILS_DEADLINE=float(os.getenv('PLACE_DETAILS_DEADLINE', '15'))
+    ZIP_CENTROIDS_PATH=os.getenv('ZIP_CENTROIDS_PATH')
+    RESTAURANT_CACHE_TTL=float(os.getenv('RESTAURANT_CACHE_TTL', '21600'))
+    RESTAURANT_CACHE_STALE_TTL=float(os.getenv('RESTAURANT_CACHE_STALE_TTL', '86400'))
+    RESTAURANT_CACHE_MAX_ENTRIES=int(os.getenv('RESTAURANT_CACHE_MAX_ENTRIES', '256'))
+    RESTAURANT_BATCH_CONCURRENCY=int(os.getenv('RESTAURANT_BATCH_CONCURRENCY', '4'))
+    RESTAURANT_BATCH_MAX_ZIPS=int(os.getenv('RESTAURANT_BATCH_MAX_ZIPS', '25'))
+    EMBEDDING_CACHE_DIR=os.getenv('EMBEDDING_CACHE_DIR', '/tmp/embedding_cache')
+    EMBEDDING_CACHE_MAX_ENTRIES=int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '4096'))
+    SEMANTIC_CACHE_ENABLED=os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLD=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+    SEMANTIC_CACHE_MAX_ENTRIES=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '1024'))
+    SEMANTIC_CACHE_VERSION_CHECK_SECONDS=float(os.getenv('SEMANTIC_CACHE_VERSION_CHECK_SECONDS', '300'))
+    INGEST_MARKER_KEY=os.getenv('INGEST_MARKER_KEY', 'pinecone/ingest_version.json')
+    QN_AGENT_CONCURRENCY=int(os.getenv('QN_AGENT_CONCURRENCY', '8'))
+    SNOWFLAKE_MAX_WORKERS=int(os.getenv('SNOWFLAKE_MAX_WORKERS', '4'))
+    PINECONE_MAX_WORKERS=int(os.getenv('PINECONE_MAX_WORKERS', '16'))
+    PLACES_PIPELINE_MAX_WORKERS=int(os.getenv('PLACES_PIPELINE_MAX_WORKERS', '16'))
+    VECTOR_MIRROR_ENABLED=os.getenv('VECTOR_MIRROR_ENABLED', 'true').lower() == 'true'
+    VECTOR_MIRROR_DIR=os.getenv('VECTOR_MIRROR_DIR', '/tmp/regulation_mirror')
+    VECTOR_MIRROR_REFRESH_SECONDS=float(os.getenv('VECTOR_MIRROR_REFRESH_SECONDS', '900'))
+    VECTOR_MIRROR_MAX_AGE=float(os.getenv('VECTOR_MIRROR_MAX_AGE', '604800'))
+    REGULATION_TOP_K=int(os.getenv('REGULATION_TOP_K', '5'))
+    HYBRID_SEARCH_ENABLED=os.getenv('HYBRID_SEARCH_ENABLED', 'true').lower() == 'true'
+    HYBRID_CANDIDATES=int(os.getenv('HYBRID_CANDIDATES', '20'))
+    HYBRID_RRF_K=int(os.getenv('HYBRID_RRF_K', '60'))
+    BM25_S3_PREFIX=os.getenv('BM25_S3_PREFIX', 'bm25/')
+    BM25_LOCAL_DIR=os.getenv('BM25_LOCAL_DIR', '/tmp/regulation_bm25')
+    BM25_REFRESH_SECONDS=float(os.getenv('BM25_REFRESH_SECONDS', '900'))
+    CONTEXT_TOKEN_BUDGET=int(os.getenv('CONTEXT_TOKEN_BUDGET', '2000'))
+    CONTEXT_MIN_SCORE=float(os.getenv('CONTEXT_MIN_SCORE', '0.75'))
+    AGENT_RESTAURANT_CONTEXT_TOKENS=int(os.getenv('AGENT_RESTAURANT_CONTEXT_TOKENS', '600'))
+    AGENT_QUESTION_MAX_TOKENS=int(os.getenv('AGENT_QUESTION_MAX_TOKENS', '500'))
+    ASK_BATCH_MAX_QUESTIONS=int(os.getenv('ASK_BATCH_MAX_QUESTIONS', '25'))
+    ASK_BATCH_CONCURRENCY=int(os.getenv('ASK_BATCH_CONCURRENCY', '4'))
+    RERANK_ENABLED=os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+    RERANK_MODEL=os.getenv('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_CANDIDATES=int(os.getenv('RERANK_CANDIDATES', '30'))
+    RERANK_TOP_N=int(os.getenv('RERANK_TOP_N', '2'))
+    RERANK_BATCH_SIZE=int(os.getenv('RERANK_BATCH_SIZE', '16'))
+    RERANK_CACHE_ENTRIES=int(os.getenv('RERANK_CACHE_ENTRIES', '10000'))
+    FAQ_ENABLED=os.getenv('FAQ_ENABLED', 'true').lower() == 'true'
+    FAQ_POINTER_KEY=os.getenv('FAQ_POINTER_KEY', 'faq/latest.json')
+    FAQ_LOCAL_PATH=os.getenv('FAQ_LOCAL_PATH', '/tmp/regulation_faq.json.gz')
+    FAQ_REFRESH_SECONDS=float(os.getenv('FAQ_REFRESH_SECONDS', '900'))
+    FAQ_MATCH_THRESHOLD=float(os.getenv('FAQ_MATCH_THRESHOLD', '0.95'))
+    QUERY_LOG_ENABLED=os.getenv('QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    QUERY_LOG_S3_PREFIX=os.getenv('QUERY_LOG_S3_PREFIX', 'query_logs/')
+    QUERY_LOG_FLUSH_SECONDS=float(os.getenv('QUERY_LOG_FLUSH_SECONDS', '600'))
+    QUERY_LOG_MAX_KEYS=int(os.getenv('QUERY_LOG_MAX_KEYS', '10000'))
+    RESTAURANTS_DATA_SOURCE=os.getenv('RESTAURANTS_DATA_SOURCE', 'live').lower()
+    RESTAURANT_SNAPSHOT_REFRESH_SECONDS=float(os.getenv('RESTAURANT_SNAPSHOT_REFRESH_SECONDS', '3600'))
+    RESTAURANT_SNAPSHOT_MAX_AGE=float(os.getenv('RESTAURANT_SNAPSHOT_MAX_AGE', '172800'))
+    RESTAURANT_SNAPSHOT_LIMIT=int(os.getenv('RESTAURANT_SNAPSHOT_LIMIT', '60'))
+    RESTAURANT_SNAPSHOT_PATH=os.getenv('RESTAURANT_SNAPSHOT_PATH', '/tmp/restaurant_snapshot.json.gz')
+    RESTAURANT_SNAPSHOT_MIN_KEEP_RATIO=float(os.getenv('RESTAURANT_SNAPSHOT_MIN_KEEP_RATIO', '0.5'))
 fastapi_config = Config()
\ No newline at end of file
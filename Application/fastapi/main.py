@@ -2,9 +2,18 @@
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import asyncio
+import json
+import logging
 import requests
 import os
+import queue
+import threading
+import time
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -15,12 +24,33 @@ from config import fastapi_config
 from utils.snowflake_client import SnowflakeClient
 from utils.s3_utils import S3Client
 from utils import get_news
+from utils.http_client import HttpClient, AsyncHttpClient
+from utils.executors import BlockingExecutor
+from utils.rate_limiter import QuotaGovernor, RateLimitError
+from utils.zip_centroids import ZipCentroidTable, DEFAULT_TABLE_PATH
+from utils.restaurant_cache import RestaurantCache
+from utils.restaurant_snapshot import RestaurantSnapshot
+from utils.single_flight import SingleFlight
+from utils.embedding_cache import EmbeddingCache, normalize_text
+from utils.semantic_cache import SemanticAnswerCache
+from utils.vector_mirror import VectorMirror
+from utils.lexical_index import LexicalIndexSync
+from utils.bm25_index import reciprocal_rank_fusion
+from utils.token_budget import count_tokens, pack_context, truncate_to_tokens
+from utils.reranker import CrossEncoderReranker
+from utils.stage_metrics import StageMetrics
+from utils.faq_store import FaqAnswerStore
+from utils.query_log import QueryLog
+from utils.streaming import AgentStreamHandler, SSE_HEADERS, sse_event
+from botocore.exceptions import ClientError
 from langchain.agents import initialize_agent, Tool, AgentType
 from langchain.chat_models import ChatOpenAI
 from tavily import TavilyClient
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
 # CORS Setup
@@ -65,6 +95,54 @@ index = pc.Index(PINECONE_INDEX_NAME)
 
 snowflake_client = SnowflakeClient()
 
+# Every Google Maps and download call goes through this pooled, keep-alive client.
+http_client = HttpClient(
+    connect_timeout=fastapi_config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=fastapi_config.HTTP_READ_TIMEOUT,
+    pool_maxsize=fastapi_config.HTTP_POOL_MAXSIZE,
+    http2=fastapi_config.HTTP2_ENABLED,
+)
+# Same settings, for calls made directly from async routes.
+async_http_client = AsyncHttpClient(
+    connect_timeout=fastapi_config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=fastapi_config.HTTP_READ_TIMEOUT,
+    pool_maxsize=fastapi_config.HTTP_POOL_MAXSIZE,
+    http2=fastapi_config.HTTP2_ENABLED,
+)
+
+# Async routes hand blocking SDK calls to these pools instead of the shared threadpool,
+# so a slow dependency only queues its own callers.
+snowflake_executor = BlockingExecutor("snowflake", fastapi_config.SNOWFLAKE_MAX_WORKERS)
+pinecone_executor = BlockingExecutor("pinecone", fastapi_config.PINECONE_MAX_WORKERS)
+places_executor = BlockingExecutor("places", fastapi_config.PLACES_PIPELINE_MAX_WORKERS)
+agent_executor = BlockingExecutor("qn-agent", fastapi_config.QN_AGENT_CONCURRENCY)
+
+# Shared budgets for Google Places; PLACES_DAILY_QUOTA=0 means no daily ceiling.
+places_governor = QuotaGovernor(
+    {"nearbysearch": fastapi_config.PLACES_NEARBY_QPS, "details": fastapi_config.PLACES_DETAILS_QPS},
+    daily_quota=fastapi_config.PLACES_DAILY_QUOTA,
+)
+
+class PlacesApiError(Exception):
+    """Google Places answered with an error status instead of results."""
+
+def places_get(endpoint: str, url: str, params: Dict[str, Any], timeout: Optional[float] = None):
+    places_governor.acquire(endpoint, timeout=fastapi_config.PLACES_ACQUIRE_TIMEOUT)
+    resp = http_client.get(url, params=params, timeout=timeout)
+    if resp.status_code != 200:
+        places_governor.report(endpoint, resp.status_code)
+        return resp
+    try:
+        data = resp.json()
+    except ValueError as e:
+        # e.g. a proxy's HTML error page; callers already handle RequestException.
+        places_governor.report_error(endpoint)
+        raise requests.RequestException(f"Non-JSON {endpoint} response: {e}") from e
+    places_governor.report(endpoint, data.get("status"))
+    return resp
+
+zip_centroids = ZipCentroidTable(fastapi_config.ZIP_CENTROIDS_PATH or DEFAULT_TABLE_PATH)
+
 class UserCreateRequest(BaseModel):
     username: str
     password: str
@@ -78,15 +156,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def get_user_from_snowflake(username: str) -> Optional[dict]:
     return snowflake_client.get_user(username)
 
-def authenticate_user(username: str, password: str):
-    user = get_user_from_snowflake(username)
+async def authenticate_user(username: str, password: str):
+    user = await snowflake_executor.run(get_user_from_snowflake, username)
     if not user:
         return False
-    if not pwd_context.verify(password, user['hashed_password']):
+    # bcrypt is deliberately slow; keep it off the event loop.
+    if not await run_in_threadpool(pwd_context.verify, password, user['hashed_password']):
         return False
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     creds_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -97,7 +176,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         username: str = payload.get("sub")
         if username is None:
             raise creds_exception
-        user = get_user_from_snowflake(username)
+        user = await snowflake_executor.run(get_user_from_snowflake, username)
         if user is None:
             raise creds_exception
         return user
@@ -105,17 +184,17 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         raise creds_exception
 
 @app.post("/register")
-def register(user: UserCreateRequest):
-    existing_user = get_user_from_snowflake(user.username)
+async def register(user: UserCreateRequest):
+    existing_user = await snowflake_executor.run(get_user_from_snowflake, user.username)
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
-    hashed_password = pwd_context.hash(user.password)
-    snowflake_client.create_user(user.username, hashed_password)
+    hashed_password = await run_in_threadpool(pwd_context.hash, user.password)
+    await snowflake_executor.run(snowflake_client.create_user, user.username, hashed_password)
     return {"username": user.username, "message": "User registered successfully"}
 
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
     access_token = create_access_token(data={"sub": user["username"]}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -125,19 +204,44 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 def protected_endpoint(current_user: dict = Depends(get_current_user)):
     return {"message": f"Hello, {current_user['username']}. You are authenticated!"}
 
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
 def geocode_zip_code(zip_code: str) -> Optional[Dict[str, float]]:
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?address={zip_code}&key={GOOGLE_API_KEY}"
-    r = requests.get(url)
+    coords = zip_centroids.get(zip_code)
+    if coords:
+        return coords
+    # Only ZIPs missing from the bundled table reach the Geocoding API.
+    r = http_client.get(GEOCODE_URL, params={"address": zip_code, "key": GOOGLE_API_KEY})
+    return _geocode_result(zip_code, r)
+
+async def geocode_zip_code_async(zip_code: str) -> Optional[Dict[str, float]]:
+    coords = zip_centroids.get(zip_code)
+    if coords:
+        return coords
+    r = await async_http_client.get(GEOCODE_URL, params={"address": zip_code, "key": GOOGLE_API_KEY})
+    return _geocode_result(zip_code, r)
+
+def _geocode_result(zip_code: str, r) -> Optional[Dict[str, float]]:
     if r.status_code == 200:
         data = r.json()
         if data["status"] == "OK" and len(data["results"]) > 0:
             loc = data["results"][0]["geometry"]["location"]
+            zip_centroids.add(zip_code, loc["lat"], loc["lng"])
             return {"lat": loc["lat"], "lng": loc["lng"]}
     return None
 
 _USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                "(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3")
 
+_EMPTY_PLACE_DETAILS = {"website": None, "types": [], "lat": None, "lng": None}
+
+# Shared across requests so the number of in-flight Place Details calls stays bounded
+# no matter how many /restaurants requests are being served at once.
+place_details_executor = ThreadPoolExecutor(
+    max_workers=fastapi_config.PLACE_DETAILS_MAX_WORKERS,
+    thread_name_prefix="place-details",
+)
+
 def get_place_details(place_id: str) -> Dict[str, Any]:
     details_url = "https://maps.googleapis.com/maps/api/place/details/json"
     params = {
@@ -145,7 +249,11 @@ def get_place_details(place_id: str) -> Dict[str, Any]:
         "key": GOOGLE_API_KEY,
         "fields": "website,types,geometry"
     }
-    resp = requests.get(details_url, params=params)
+    try:
+        resp = places_get("details", details_url, params, timeout=fastapi_config.PLACE_DETAILS_TIMEOUT)
+    except (requests.RequestException, RateLimitError) as e:
+        logger.warning(f"Place details lookup failed for {place_id}: {e}")
+        return dict(_EMPTY_PLACE_DETAILS)
     if resp.status_code == 200:
         d_data = resp.json()
         if d_data.get("status") == "OK":
@@ -156,96 +264,569 @@ def get_place_details(place_id: str) -> Dict[str, Any]:
                 "lat": result.get("geometry", {}).get("location", {}).get("lat"),
                 "lng": result.get("geometry", {}).get("location", {}).get("lng")
             }
-    return {"website": None, "types": [], "lat": None, "lng": None}
+    return dict(_EMPTY_PLACE_DETAILS)
+
+def get_place_details_many(place_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetches Place Details for every id, in the same order as `place_ids`.
+    Lookups that fail or miss the fan-out deadline come back as empty details.
+    """
+    if not fastapi_config.PLACE_DETAILS_CONCURRENT:
+        return [get_place_details(place_id) for place_id in place_ids]
+
+    futures = [place_details_executor.submit(get_place_details, place_id) for place_id in place_ids]
+    _, not_done = wait(futures, timeout=fastapi_config.PLACE_DETAILS_DEADLINE)
+    details = []
+    for place_id, future in zip(place_ids, futures):
+        if future in not_done:
+            future.cancel()
+            logger.warning(f"Place details lookup for {place_id} missed the fan-out deadline.")
+            details.append(dict(_EMPTY_PLACE_DETAILS))
+            continue
+        try:
+            details.append(future.result())
+        except Exception as e:
+            logger.warning(f"Place details lookup failed for {place_id}: {e}")
+            details.append(dict(_EMPTY_PLACE_DETAILS))
+    return details
+
+NEARBY_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+# Google only accepts a next_page_token a couple of seconds after issuing it.
+NEXT_PAGE_TOKEN_DELAY = 2.0
+NEXT_PAGE_TOKEN_RETRIES = 3
+
+nearby_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nearby-search")
+
+def _build_restaurants(places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    restaurants = []
+    all_details = get_place_details_many([place.get("place_id") for place in places])
+    for place, details in zip(places, all_details):
+        place_id = place.get("place_id")
+        location = place.get("geometry", {}).get("location", {})
+        cuisine_types = [t for t in details["types"] if t != "restaurant"] or ["N/A"]
+        restaurant_info = {
+            "name": place.get("name"),
+            "address": place.get("vicinity"),
+            "rating": place.get("rating"),
+            "user_ratings_total": place.get("user_ratings_total"),
+            "price_level": place.get("price_level"),
+            "place_id": place_id,
+            "lat": details["lat"] if details["lat"] is not None else location.get("lat"),
+            "lng": details["lng"] if details["lng"] is not None else location.get("lng"),
+            "cuisine_types": cuisine_types,
+            "website": details["website"]
+        }
+        restaurants.append(restaurant_info)
+    return restaurants
 
 def find_restaurants(lat: float, lng: float, radius_meters: int = 8047) -> List[Dict[str, Any]]:
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{lat},{lng}",
         "radius": radius_meters,
         "type": "restaurant",
         "key": GOOGLE_API_KEY
     }
-    resp = requests.get(url, params=params)
-    restaurants = []
-    if resp.status_code == 200:
+    try:
+        resp = places_get("nearbysearch", NEARBY_SEARCH_URL, params)
+    except requests.RequestException as e:
+        raise PlacesApiError(f"Nearby search failed: {e}") from e
+    # Raise rather than return [] on failure: an empty list is cached as "no restaurants here".
+    if resp.status_code != 200:
+        raise PlacesApiError(f"Nearby search returned HTTP {resp.status_code}.")
+    data = resp.json()
+    if data["status"] == "ZERO_RESULTS":
+        return []
+    if data["status"] != "OK":
+        raise PlacesApiError(f"Nearby search returned {data['status']}.")
+    return _build_restaurants(data.get("results", []))
+
+def _fetch_nearby_page(params: Dict[str, Any], token_delay: float = 0.0) -> Dict[str, Any]:
+    # Failures come back as {"error": ...} so iter_restaurant_pages can end the stream with them.
+    time.sleep(token_delay)
+    for attempt in range(NEXT_PAGE_TOKEN_RETRIES):
+        try:
+            resp = places_get("nearbysearch", NEARBY_SEARCH_URL, params)
+        except (requests.RequestException, RateLimitError) as e:
+            logger.warning(f"Nearby search page request failed: {e}")
+            return {"error": str(e)}
+        if resp.status_code != 200:
+            return {"error": f"Nearby search returned HTTP {resp.status_code}."}
         data = resp.json()
-        if data["status"] == "OK":
-            for place in data.get("results", []):
-                place_id = place.get("place_id")
-                details = get_place_details(place_id)
-                cuisine_types = [t for t in details["types"] if t != "restaurant"] or ["N/A"]
-                restaurant_info = {
-                    "name": place.get("name"),
-                    "address": place.get("vicinity"),
-                    "rating": place.get("rating"),
-                    "user_ratings_total": place.get("user_ratings_total"),
-                    "price_level": place.get("price_level"),
-                    "place_id": place_id,
-                    "lat": details["lat"],
-                    "lng": details["lng"],
-                    "cuisine_types": cuisine_types,
-                    "website": details["website"]
-                }
-                restaurants.append(restaurant_info)
-    return restaurants
+        # INVALID_REQUEST on a page token means it is not active yet.
+        if data.get("status") == "INVALID_REQUEST" and "pagetoken" in params:
+            time.sleep(NEXT_PAGE_TOKEN_DELAY / 2)
+            continue
+        if data.get("status") not in ("OK", "ZERO_RESULTS"):
+            return {"error": f"Nearby search returned {data.get('status')}."}
+        return data
+    return {"error": "Nearby search page token never became valid."}
+
+def iter_restaurant_pages(lat: float, lng: float, radius_meters: int = 8047) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields restaurants one nearby-search page at a time, following next_page_token.
+    The request for page N+1 is already in flight while page N's details are fetched.
+    Raises PlacesApiError, after the pages already yielded, when a page request fails.
+    """
+    params = {
+        "location": f"{lat},{lng}",
+        "radius": radius_meters,
+        "type": "restaurant",
+        "key": GOOGLE_API_KEY
+    }
+    pending = nearby_search_executor.submit(_fetch_nearby_page, params)
+    seen_place_ids = set()
+    while pending is not None:
+        data = pending.result()
+        if "error" in data:
+            raise PlacesApiError(data["error"])
+        next_page_token = data.get("next_page_token")
+        pending = None
+        if next_page_token:
+            pending = nearby_search_executor.submit(
+                _fetch_nearby_page, {"pagetoken": next_page_token, "key": GOOGLE_API_KEY}, NEXT_PAGE_TOKEN_DELAY
+            )
+        places = [p for p in data.get("results", []) if p.get("place_id") not in seen_place_ids]
+        seen_place_ids.update(p.get("place_id") for p in places)
+        if places:
+            yield _build_restaurants(places)
+
+DEFAULT_RADIUS_METERS = 8047
+
+restaurant_snapshot = RestaurantSnapshot(
+    snowflake_client.get_restaurant_details,
+    refresh_interval_seconds=fastapi_config.RESTAURANT_SNAPSHOT_REFRESH_SECONDS,
+    max_age_seconds=fastapi_config.RESTAURANT_SNAPSHOT_MAX_AGE,
+    result_limit=fastapi_config.RESTAURANT_SNAPSHOT_LIMIT,
+    path=fastapi_config.RESTAURANT_SNAPSHOT_PATH,
+    min_keep_ratio=fastapi_config.RESTAURANT_SNAPSHOT_MIN_KEEP_RATIO,
+)
+
+def lookup_restaurants(zip_code: str, radius_meters: int = DEFAULT_RADIUS_METERS) -> Optional[List[Dict[str, Any]]]:
+    # Returns None when the ZIP cannot be geocoded and raises when Places fails, so neither is cached.
+    coords = geocode_zip_code(zip_code)
+    if not coords:
+        return None
+    restaurants = snapshot_restaurants(coords, radius_meters)
+    if restaurants:
+        return restaurants
+    # Nothing loaded for this area yet; fall through to the live Places API.
+    return find_restaurants(coords["lat"], coords["lng"], radius_meters)
+
+def snapshot_restaurants(coords: Dict[str, float], radius_meters: int) -> Optional[List[Dict[str, Any]]]:
+    if fastapi_config.RESTAURANTS_DATA_SOURCE == "snapshot" and restaurant_snapshot.is_fresh():
+        return restaurant_snapshot.query_radius(coords["lat"], coords["lng"], radius_meters)
+    return None
+
+# Concurrent misses (and background refreshes) for the same ZIP and radius share one pipeline run.
+restaurant_flights = SingleFlight()
+
+def load_restaurants(zip_code: str, radius_meters: int = DEFAULT_RADIUS_METERS) -> Optional[List[Dict[str, Any]]]:
+    return restaurant_flights.do((zip_code, radius_meters), lookup_restaurants, zip_code, radius_meters)
+
+restaurant_cache = RestaurantCache(
+    load_restaurants,
+    ttl_seconds=fastapi_config.RESTAURANT_CACHE_TTL,
+    stale_ttl_seconds=fastapi_config.RESTAURANT_CACHE_STALE_TTL,
+    max_entries=fastapi_config.RESTAURANT_CACHE_MAX_ENTRIES,
+)
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Chunks of regulation text sent to GPT-4 per question.
+REGULATION_TOP_K = fastapi_config.REGULATION_TOP_K
+
+embedding_cache = EmbeddingCache(
+    fastapi_config.EMBEDDING_CACHE_DIR,
+    max_memory_entries=fastapi_config.EMBEDDING_CACHE_MAX_ENTRIES,
+)
+
+def _create_embedding(text: str) -> List[float]:
+    embedding_response = openai.Embedding.create(model=EMBEDDING_MODEL, input=text)
+    return embedding_response['data'][0]['embedding']
+
+def embed_question(text: str) -> List[float]:
+    return embedding_cache.get_or_create(text, EMBEDDING_MODEL, _create_embedding)
+
+async def embed_question_async(text: str) -> List[float]:
+    vector = embedding_cache.get(text, EMBEDDING_MODEL)
+    if vector is None:
+        embedding_response = await openai.Embedding.acreate(model=EMBEDDING_MODEL, input=text)
+        vector = embedding_response['data'][0]['embedding']
+        embedding_cache.put(text, EMBEDDING_MODEL, vector)
+    return vector
+
+def regulation_corpus_version():
+    # The embeddings DAG rewrites the ingest marker on every run; the vector count
+    # also catches ingestions that bypass the DAG.
+    try:
+        marker = S3Client.get_s3_client().head_object(
+            Bucket=fastapi_config.S3_BUCKET_NAME, Key=fastapi_config.INGEST_MARKER_KEY
+        )["ETag"]
+    except ClientError:
+        marker = None
+    return (marker, index.describe_index_stats().get("total_vector_count"))
+
+answer_cache = SemanticAnswerCache(
+    threshold=fastapi_config.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=fastapi_config.SEMANTIC_CACHE_MAX_ENTRIES,
+    corpus_version=regulation_corpus_version,
+    version_check_seconds=fastapi_config.SEMANTIC_CACHE_VERSION_CHECK_SECONDS,
+)
 
 class QueryModel(BaseModel):
     question: str
 
-@app.post("/ask")
-def ask_question(query: QueryModel):
-    # For direct regulation queries if needed
-    try:
-        embedding_response = openai.Embedding.create(
-            model="text-embedding-ada-002", input=query.question
-        )
-        embedding_vector = embedding_response['data'][0]['embedding']
+REGULATION_SYSTEM_PROMPT = """
+                    You are an expert in Massachusetts food regulation laws. Respond strictly based on the provided context. Include regulation titles, codes, and user-friendly explanations.
+                """
+
+# Answers regulation queries from a local copy of the index; Pinecone is only
+# queried while the mirror is empty or stale.
+regulation_mirror = VectorMirror(
+    index,
+    fastapi_config.VECTOR_MIRROR_DIR,
+    refresh_interval_seconds=fastapi_config.VECTOR_MIRROR_REFRESH_SECONDS,
+    max_age_seconds=fastapi_config.VECTOR_MIRROR_MAX_AGE,
+)
+
+def use_regulation_mirror() -> bool:
+    return fastapi_config.VECTOR_MIRROR_ENABLED and regulation_mirror.is_fresh()
+
+# BM25 index over parsed_pdfs/, built by the Airflow pipeline, for exact terms and
+# citations ("105 CMR 590") that embeddings match poorly.
+regulation_lexical = LexicalIndexSync(
+    S3Client.get_s3_client,
+    fastapi_config.S3_BUCKET_NAME,
+    fastapi_config.BM25_S3_PREFIX,
+    fastapi_config.BM25_LOCAL_DIR,
+    refresh_interval_seconds=fastapi_config.BM25_REFRESH_SECONDS,
+)
+
+# Optional cross-encoder pass over an over-fetched candidate list (needs sentence-transformers).
+reranker = CrossEncoderReranker(
+    fastapi_config.RERANK_MODEL,
+    batch_size=fastapi_config.RERANK_BATCH_SIZE,
+    max_cache_entries=fastapi_config.RERANK_CACHE_ENTRIES,
+)
+
+# Per-stage latency of the regulation answer pipeline, reported by /ask/metrics.
+regulation_metrics = StageMetrics()
+
+def use_reranker() -> bool:
+    return fastapi_config.RERANK_ENABLED and reranker.available
+
+def query_vector_matches(embedding_vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+    if use_regulation_mirror():
+        with regulation_metrics.time("vector_mirror"):
+            return regulation_mirror.query(embedding_vector, top_k)
+    with regulation_metrics.time("vector_pinecone"):
         response = index.query(
             vector=embedding_vector,
-            top_k=5,
+            top_k=top_k,
             include_metadata=True,
         )
-        matches = response.get('matches', [])
-        if not matches:
-            raise HTTPException(status_code=404, detail="No relevant data found.")
-        contexts = [m['metadata']['content'] for m in matches]
-        combined_context = " ".join(contexts)
-        completion = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": """
-                    You are an expert in Massachusetts food regulation laws. Respond strictly based on the provided context. Include regulation titles, codes, and user-friendly explanations.
-                """},
-                {"role": "user", "content": f"Context: {combined_context}\n\n{query.question}"},
-            ],
+    return [{"id": m['id'], "score": m['score'], "metadata": m['metadata']} for m in response.get('matches', [])]
+
+def query_regulation_matches(embedding_vector: List[float], question: Optional[str] = None,
+                             top_k: int = REGULATION_TOP_K) -> List[Dict[str, Any]]:
+    if not (question and use_reranker()):
+        return query_candidate_matches(embedding_vector, question, top_k)
+    candidates = query_candidate_matches(embedding_vector, question, max(top_k, fastapi_config.RERANK_CANDIDATES))
+    with regulation_metrics.time("rerank"):
+        return reranker.rerank(question, candidates, keep=fastapi_config.RERANK_TOP_N)
+
+def query_candidate_matches(embedding_vector: List[float], question: Optional[str], top_k: int) -> List[Dict[str, Any]]:
+    if not (question and fastapi_config.HYBRID_SEARCH_ENABLED):
+        return query_vector_matches(embedding_vector, top_k)
+    depth = max(top_k, fastapi_config.HYBRID_CANDIDATES)
+    vector_matches = query_vector_matches(embedding_vector, depth)
+    with regulation_metrics.time("lexical"):
+        lexical_matches = regulation_lexical.search(question, depth)
+    if not lexical_matches:
+        return vector_matches[:top_k]
+    by_id = {m['id']: m for m in vector_matches}
+    fused = reciprocal_rank_fusion(
+        [[m['id'] for m in vector_matches], [doc_id for doc_id, _ in lexical_matches]],
+        k=fastapi_config.HYBRID_RRF_K,
+        limit=top_k,
+    )
+    matches = []
+    for doc_id, score in fused:
+        # Keep the cosine score where there is one so the relevance floor still applies;
+        # lexical-only hits (e.g. exact citations) carry just their fused score and are exempt from it.
+        if doc_id in by_id:
+            matches.append(dict(by_id[doc_id], score=score, vector_score=by_id[doc_id]['score']))
+        else:
+            matches.append({"id": doc_id, "score": score, "lexical_only": True,
+                            "metadata": {"content": regulation_lexical.snippet(doc_id)}})
+    return matches
+
+def retrieve_regulation_context(embedding_vector: List[float], question: Optional[str] = None):
+    matches = query_regulation_matches(embedding_vector, question)
+    with regulation_metrics.time("pack_context"):
+        chunks, context_ids, token_report = pack_context(
+            matches,
+            budget_tokens=fastapi_config.CONTEXT_TOKEN_BUDGET,
+            min_score=fastapi_config.CONTEXT_MIN_SCORE,
         )
-        answer = completion['choices'][0]['message']['content']
-        return {"answer": answer}
+    if not chunks:
+        raise HTTPException(status_code=404, detail="No relevant data found.")
+    return chunks, context_ids, token_report
+
+async def retrieve_regulation_context_async(embedding_vector: List[float], question: Optional[str] = None):
+    # Fully in-memory retrieval is cheap enough for the event loop; Pinecone calls and
+    # cross-encoder inference are not.
+    if use_regulation_mirror() and not use_reranker():
+        return retrieve_regulation_context(embedding_vector, question)
+    return await pinecone_executor.run(retrieve_regulation_context, embedding_vector, question)
+
+def regulation_messages(question: str, chunks: List[str]) -> List[Dict[str, str]]:
+    combined_context = " ".join(chunks)
+    return [
+        {"role": "system", "content": REGULATION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context: {combined_context}\n\n{question}"},
+    ]
+
+def prompt_token_count(messages: List[Dict[str, str]]) -> int:
+    # Chat formatting adds a few tokens per message and for the reply primer.
+    return sum(count_tokens(m["content"]) + 3 for m in messages) + 3
+
+def token_usage(messages: List[Dict[str, str]], token_report: Dict[str, int], completion_tokens: int) -> Dict[str, Any]:
+    usage = dict(token_report, prompt_tokens=prompt_token_count(messages), completion_tokens=completion_tokens)
+    logger.info(f"Regulation answer token usage: {usage}")
+    return usage
+
+async def lookup_cached_answer(embedding_vector: List[float]) -> Optional[Dict[str, Any]]:
+    if not fastapi_config.SEMANTIC_CACHE_ENABLED:
+        return None
+    # A lookup may first re-read the corpus version from S3 and Pinecone.
+    cached = await pinecone_executor.run(answer_cache.lookup, embedding_vector)
+    if not cached:
+        return None
+    return {"answer": cached["answer"], "context_ids": cached["context_ids"], "cached": True}
+
+# Answers the mass_gov DAG precomputes for curated and frequently asked questions.
+faq_store = FaqAnswerStore(
+    S3Client.get_s3_client,
+    fastapi_config.S3_BUCKET_NAME,
+    fastapi_config.FAQ_POINTER_KEY,
+    fastapi_config.FAQ_LOCAL_PATH,
+    refresh_interval_seconds=fastapi_config.FAQ_REFRESH_SECONDS,
+    threshold=fastapi_config.FAQ_MATCH_THRESHOLD,
+)
+
+# Question counts the DAG reads to decide which answers to precompute.
+query_log = QueryLog(
+    S3Client.get_s3_client,
+    fastapi_config.S3_BUCKET_NAME,
+    fastapi_config.QUERY_LOG_S3_PREFIX,
+    flush_interval_seconds=fastapi_config.QUERY_LOG_FLUSH_SECONDS,
+    enabled=fastapi_config.QUERY_LOG_ENABLED,
+    max_keys=fastapi_config.QUERY_LOG_MAX_KEYS,
+)
+
+def precomputed_answer(question: str, embedding_vector: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+    # Without a vector only an exact (normalized) match is tried, so no embedding is needed.
+    if not fastapi_config.FAQ_ENABLED:
+        return None
+    match = faq_store.match_text(question) if embedding_vector is None else faq_store.match_vector(embedding_vector)
+    if match is None:
+        return None
+    return {
+        "answer": match["answer"],
+        "context_ids": match["context_ids"],
+        "faq": {"question": match["faq_question"], "version": match["faq_version"], "similarity": match["similarity"]},
+    }
+
+async def answer_regulation_question(question: str, embedding_vector: List[float],
+                                     completion_slots: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+    ready = precomputed_answer(question, embedding_vector) or await lookup_cached_answer(embedding_vector)
+    if ready:
+        return ready
+    chunks, context_ids, token_report = await retrieve_regulation_context_async(embedding_vector, question)
+    messages = regulation_messages(question, chunks)
+    if completion_slots is None:
+        with regulation_metrics.time("completion"):
+            completion = await openai.ChatCompletion.acreate(model="gpt-4", messages=messages)
+    else:
+        async with completion_slots:
+            with regulation_metrics.time("completion"):
+                completion = await openai.ChatCompletion.acreate(model="gpt-4", messages=messages)
+    answer = completion['choices'][0]['message']['content']
+    if fastapi_config.SEMANTIC_CACHE_ENABLED:
+        answer_cache.store(question, embedding_vector, answer, context_ids)
+    usage = token_usage(messages, token_report, completion['usage']['completion_tokens'])
+    return {"answer": answer, "context_ids": context_ids, "usage": usage, "contexts": dict(zip(context_ids, chunks))}
+
+@app.post("/ask")
+async def ask_question(query: QueryModel):
+    # For direct regulation queries if needed
+    query_log.record(query.question)
+    try:
+        ready = precomputed_answer(query.question)
+        if ready:
+            return ready
+        embedding_vector = await embed_question_async(query.question)
+        result = await answer_regulation_question(query.question, embedding_vector)
+        result.pop("contexts", None)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/ask/stream")
+async def ask_question_stream(query: QueryModel):
+    # Same pipeline as /ask, but the completion is sent as server-sent events:
+    # `token` events while GPT-4 writes, then one `done` event with the full answer.
+    query_log.record(query.question)
+    try:
+        ready = precomputed_answer(query.question)
+        if not ready:
+            embedding_vector = await embed_question_async(query.question)
+            ready = precomputed_answer(query.question, embedding_vector) or await lookup_cached_answer(embedding_vector)
+        if not ready:
+            chunks, context_ids, token_report = await retrieve_regulation_context_async(embedding_vector, query.question)
+            messages = regulation_messages(query.question, chunks)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def sse_answer():
+        if ready:
+            yield sse_event("token", {"text": ready["answer"]})
+            yield sse_event("done", ready)
+            return
+        parts = []
+        started = time.perf_counter()
+        try:
+            async for chunk in await openai.ChatCompletion.acreate(
+                model="gpt-4",
+                messages=messages,
+                stream=True,
+            ):
+                text = chunk['choices'][0]['delta'].get('content')
+                if text:
+                    if not parts:
+                        regulation_metrics.record("completion_first_token", time.perf_counter() - started)
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+        except Exception as e:
+            logger.warning(f"Streaming /ask completion failed: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        answer = "".join(parts)
+        if fastapi_config.SEMANTIC_CACHE_ENABLED:
+            answer_cache.store(query.question, embedding_vector, answer, context_ids)
+        # Streamed completions carry no usage block, so the answer is counted locally.
+        usage = token_usage(messages, token_report, count_tokens(answer))
+        yield sse_event("done", {"answer": answer, "context_ids": context_ids, "usage": usage})
+
+    return StreamingResponse(sse_answer(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+class AskBatchRequest(BaseModel):
+    questions: List[str]
+
+async def embed_questions_async(texts: List[str]) -> List[List[float]]:
+    # Cache misses are embedded together in a single request.
+    vectors = [embedding_cache.get(text, EMBEDDING_MODEL) for text in texts]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        embedding_response = await openai.Embedding.acreate(model=EMBEDDING_MODEL, input=[texts[i] for i in missing])
+        for item in embedding_response['data']:
+            i = missing[item['index']]
+            vectors[i] = item['embedding']
+            embedding_cache.put(texts[i], EMBEDDING_MODEL, vectors[i])
+    return vectors
+
+@app.post("/ask/batch")
+async def ask_questions_batch(request: AskBatchRequest):
+    # NDJSON, one line per distinct question in completion order. Each regulation chunk's
+    # text is sent once, on the first line that uses it; later lines list only its id.
+    positions: Dict[str, List[int]] = {}
+    questions: List[str] = []
+    for position, question in enumerate(request.questions):
+        key = normalize_text(question)
+        if not key:
+            continue
+        if key not in positions:
+            positions[key] = []
+            questions.append(question.strip())
+        positions[key].append(position)
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions provided.")
+    if len(questions) > fastapi_config.ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {fastapi_config.ASK_BATCH_MAX_QUESTIONS} questions per batch.")
+    for question in questions:
+        query_log.record(question)
+    try:
+        vectors = await embed_questions_async(questions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    completion_slots = asyncio.Semaphore(fastapi_config.ASK_BATCH_CONCURRENCY)
+
+    async def answer(i: int):
+        try:
+            return i, await answer_regulation_question(questions[i], vectors[i], completion_slots), None
+        except HTTPException as e:
+            return i, None, e.detail
+        except Exception as e:
+            logger.warning(f"Batch answer failed for {questions[i]!r}: {e}")
+            return i, None, str(e)
+
+    tasks = [asyncio.ensure_future(answer(i)) for i in range(len(questions))]
+
+    async def ndjson_answers():
+        sent_contexts = set()
+        try:
+            for next_answer in asyncio.as_completed(tasks):
+                i, result, error = await next_answer
+                line = {"question": questions[i], "indexes": positions[normalize_text(questions[i])]}
+                if error is not None:
+                    line["error"] = error
+                else:
+                    contexts = result.pop("contexts", {})
+                    line.update(result)
+                    line["contexts"] = {cid: text for cid, text in contexts.items() if cid not in sent_contexts}
+                    sent_contexts.update(contexts)
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away: stop the questions that have not been answered yet.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson_answers(), media_type="application/x-ndjson")
+
 tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
 
 def search_regulations(query: str) -> str:
     # Used by the agent
     try:
-        embedding_response = openai.Embedding.create(model="text-embedding-ada-002", input=query)
-        embedding_vector = embedding_response['data'][0]['embedding']
-        response = index.query(vector=embedding_vector, top_k=5, include_metadata=True)
-        matches = response.get('matches', [])
-        if not matches:
+        embedding_vector = embed_question(query)
+        matches = query_regulation_matches(embedding_vector, query)
+        chunks, _, _ = pack_context(
+            matches,
+            budget_tokens=fastapi_config.CONTEXT_TOKEN_BUDGET,
+            min_score=fastapi_config.CONTEXT_MIN_SCORE,
+        )
+        if not chunks:
             return "No relevant regulations found."
-        contexts = [m['metadata']['content'] for m in matches]
-        return " ".join(contexts)
+        return " ".join(chunks)
     except Exception:
         return "Error searching regulations."
 
 def get_restaurants_tool(zip_code: str) -> str:
-    coords = geocode_zip_code(zip_code)
-    if not coords:
+    try:
+        restaurants = restaurant_cache.get(zip_code.strip(), DEFAULT_RADIUS_METERS)
+    except RateLimitError:
+        return "Restaurant data is temporarily unavailable (Google Places quota reached)."
+    except (PlacesApiError, requests.RequestException):
+        return "Restaurant data is temporarily unavailable."
+    if restaurants is None:
         return "Invalid zip code."
-    restaurants = find_restaurants(coords["lat"], coords["lng"])
     if not restaurants:
         return "No restaurants found."
     result = ""
@@ -260,7 +841,7 @@ def web_search_tool(query: str) -> str:
 def download_tool(url: str) -> str:
     headers = {"User-Agent": _USER_AGENT}
     try:
-        resp = requests.get(url, headers=headers)
+        resp = http_client.get(url, headers=headers)
         if resp.status_code == 200:
             content = resp.text[:500]
             return f"Downloaded content snippet: {content}"
@@ -292,7 +873,9 @@ You are a Massachusetts Restaurant Business Assistant:
 - Always summarize the answer at put that the end.
 """
 
-llm_for_agent = ChatOpenAI(temperature=0, openai_api_key=OPENAI_API_KEY, max_tokens=3000)
+# streaming=True only changes how tokens arrive; /qn_agent still receives the whole
+# output, while /qn_agent/stream forwards them through its callback handler.
+llm_for_agent = ChatOpenAI(temperature=0, openai_api_key=OPENAI_API_KEY, max_tokens=3000, streaming=True)
 
 agent = initialize_agent(
     tools=tools,
@@ -308,34 +891,310 @@ class QNRequest(BaseModel):
     restaurants_data: List[Dict[str, Any]] = []
     zip_code: str
 
-@app.post("/qn_agent")
-def qn_agent_endpoint(request: QNRequest, current_user: dict = Depends(get_current_user)):
-    # Build context
+def build_agent_prompt(request: QNRequest):
+    # The agent re-sends this prompt on every reasoning step, so the restaurant list
+    # is capped at AGENT_RESTAURANT_CONTEXT_TOKENS.
     restaurant_context = "Local Restaurants Data:\n"
+    budget = fastapi_config.AGENT_RESTAURANT_CONTEXT_TOKENS
+    included = 0
     for r in request.restaurants_data[:10]:
-        restaurant_context += f"- {r['name']} (Rating: {r.get('rating','N/A')}, Cuisine: {', '.join(r['cuisine_types'])}, Website: {r.get('website','N/A')})\n"
-    prompt = f"{GLOBAL_SYSTEM_PROMPT}\n\nZIP Code: {request.zip_code}\n\n{restaurant_context}\nUser Query: {request.question}"
+        line = f"- {r['name']} (Rating: {r.get('rating','N/A')}, Cuisine: {', '.join(r['cuisine_types'])}, Website: {r.get('website','N/A')})\n"
+        tokens = count_tokens(line)
+        if tokens > budget:
+            break
+        restaurant_context += line
+        budget -= tokens
+        included += 1
+    question = truncate_to_tokens(request.question, fastapi_config.AGENT_QUESTION_MAX_TOKENS)
+    prompt = f"{GLOBAL_SYSTEM_PROMPT}\n\nZIP Code: {request.zip_code}\n\n{restaurant_context}\nUser Query: {question}"
+    usage = {
+        "prompt_tokens": count_tokens(prompt),
+        "system_prompt_tokens": count_tokens(GLOBAL_SYSTEM_PROMPT),
+        "restaurant_context_tokens": fastapi_config.AGENT_RESTAURANT_CONTEXT_TOKENS - budget,
+        "restaurants_included": included,
+        "question_truncated": question != request.question,
+    }
+    logger.info(f"Agent prompt token usage: {usage}")
+    return prompt, usage
+
+@app.post("/qn_agent")
+async def qn_agent_endpoint(request: QNRequest, current_user: dict = Depends(get_current_user)):
+    prompt, usage = build_agent_prompt(request)
 
     try:
-        response = agent({"input": prompt, "chat_history": []})
+        # Agent runs hold a thread for up to max_execution_time; agent_executor caps how many run at once.
+        response = await agent_executor.run(agent, {"input": prompt, "chat_history": []})
         # The response is a dict with 'input', 'chat_history', 'output'
         answer = response.get("output", "No final answer provided.")
-        return {"answer": answer}
+        return {"answer": answer, "usage": usage}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/qn_agent/stream")
+async def qn_agent_stream_endpoint(request: QNRequest, current_user: dict = Depends(get_current_user)):
+    # Server-sent events: `step` / `observation` as the agent uses tools, `token` while
+    # it writes the final answer, then `done` with the complete answer (or `error`).
+    prompt, usage = build_agent_prompt(request)
+    handler = AgentStreamHandler()
+
+    def run_agent():
+        try:
+            response = agent({"input": prompt, "chat_history": []}, callbacks=[handler])
+            handler.finish("done", {"answer": response.get("output", "No final answer provided."), "usage": usage})
+        except Exception as e:
+            if not handler.cancelled:
+                logger.warning(f"Streaming agent run failed: {e}")
+            handler.finish("error", {"detail": str(e)})
+
+    def on_run_done(task: "asyncio.Future"):
+        # run_agent reports its own errors; this covers the executor never running it
+        # (e.g. shut down or cancelled), which would otherwise leave the stream open forever.
+        if task.cancelled():
+            handler.finish("error", {"detail": "Agent run was cancelled."})
+        elif task.exception() is not None:
+            logger.warning(f"Streaming agent run could not start: {task.exception()}")
+            handler.finish("error", {"detail": str(task.exception())})
+
+    run = asyncio.ensure_future(agent_executor.run(run_agent))
+    run.add_done_callback(on_run_done)
+
+    async def sse_agent():
+        try:
+            async for event in handler.iter_events():
+                yield event
+        finally:
+            handler.cancelled = True
+
+    return StreamingResponse(sse_agent(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.get("/restaurants")
-def get_restaurants(zip_code: str, current_user: dict = Depends(get_current_user)):
-    coords = geocode_zip_code(zip_code)
-    if not coords:
+async def get_restaurants(zip_code: str, radius_meters: int = DEFAULT_RADIUS_METERS, current_user: dict = Depends(get_current_user)):
+    restaurants = await places_executor.run(restaurant_cache.get, zip_code, radius_meters)
+    if restaurants is None:
         raise HTTPException(status_code=404, detail="Could not geocode the provided zip code.")
-    restaurants = find_restaurants(coords["lat"], coords["lng"])
     return {"restaurants": restaurants}
 
+_STREAM_DONE = object()
+
+def _stream_live_restaurants(zip_code: str, radius_meters: int, coords: Dict[str, float], pages: "queue.Queue"):
+    # Runs as a restaurant_flights call, so a concurrent /restaurants or stream request for the
+    # same key waits for this one instead of starting its own Places pipeline.
+    ran = False
+
+    def live_pipeline():
+        nonlocal ran
+        ran = True
+        collected = []
+        for restaurants in iter_restaurant_pages(coords["lat"], coords["lng"], radius_meters):
+            collected.extend(restaurants)
+            pages.put(restaurants)
+        return collected
+
+    try:
+        restaurants = restaurant_flights.do((zip_code, radius_meters), live_pipeline)
+        if ran:
+            restaurant_cache.put(zip_code, radius_meters, restaurants)
+        elif restaurants is None:
+            raise PlacesApiError("Could not geocode the provided zip code.")
+        else:
+            pages.put(restaurants)
+    except Exception as e:
+        pages.put(e)
+    finally:
+        pages.put(_STREAM_DONE)
+
+@app.get("/restaurants/stream")
+def stream_restaurants(zip_code: str, radius_meters: int = DEFAULT_RADIUS_METERS, current_user: dict = Depends(get_current_user)):
+    # Cached and snapshot results go out as a single page; only misses stream live pages.
+    restaurants = restaurant_cache.peek(zip_code, radius_meters)
+    if restaurants is None:
+        coords = geocode_zip_code(zip_code)
+        if not coords:
+            raise HTTPException(status_code=404, detail="Could not geocode the provided zip code.")
+        restaurants = snapshot_restaurants(coords, radius_meters) or None
+    if restaurants is not None:
+        return StreamingResponse(iter([json.dumps({"page": 1, "restaurants": restaurants}) + "\n"]),
+                                 media_type="application/x-ndjson")
+
+    pages: "queue.Queue" = queue.Queue()
+    # Keeps running after a client disconnect, so the result still reaches the cache.
+    threading.Thread(target=_stream_live_restaurants, args=(zip_code, radius_meters, coords, pages),
+                     name="restaurant-stream", daemon=True).start()
+
+    def ndjson_pages():
+        page_number = 0
+        while True:
+            item = pages.get()
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, Exception):
+                # The status line has already been sent; end the stream with an explicit error record.
+                logger.warning(f"Restaurant stream for {zip_code} failed: {item}")
+                yield json.dumps({"error": str(item)}) + "\n"
+                continue
+            page_number += 1
+            yield json.dumps({"page": page_number, "restaurants": item}) + "\n"
+
+    return StreamingResponse(ndjson_pages(), media_type="application/x-ndjson")
+
+class RestaurantBatchRequest(BaseModel):
+    zip_codes: List[str]
+    radius_meters: int = DEFAULT_RADIUS_METERS
+
+# Shared by every batch request, so its size caps concurrent ZIP pipelines service-wide.
+restaurant_batch_executor = ThreadPoolExecutor(
+    max_workers=fastapi_config.RESTAURANT_BATCH_CONCURRENCY,
+    thread_name_prefix="restaurant-batch",
+)
+
+@app.post("/restaurants/batch")
+def get_restaurants_batch(request: RestaurantBatchRequest, current_user: dict = Depends(get_current_user)):
+    zip_codes = list(dict.fromkeys(z.strip() for z in request.zip_codes if z.strip()))
+    if not zip_codes:
+        raise HTTPException(status_code=400, detail="No zip codes provided.")
+    if len(zip_codes) > fastapi_config.RESTAURANT_BATCH_MAX_ZIPS:
+        raise HTTPException(status_code=400, detail=f"At most {fastapi_config.RESTAURANT_BATCH_MAX_ZIPS} zip codes per batch.")
+
+    futures = {
+        restaurant_batch_executor.submit(restaurant_cache.get, zip_code, request.radius_meters): zip_code
+        for zip_code in zip_codes
+    }
+
+    def ndjson_results():
+        # A place inside several overlapping radii is returned only with the first ZIP to finish.
+        seen_place_ids = set()
+        for future in as_completed(futures):
+            zip_code = futures[future]
+            try:
+                restaurants = future.result()
+            except Exception as e:
+                logger.warning(f"Batch restaurant lookup failed for {zip_code}: {e}")
+                yield json.dumps({"zip_code": zip_code, "restaurants": [], "error": str(e)}) + "\n"
+                continue
+            if restaurants is None:
+                yield json.dumps({"zip_code": zip_code, "restaurants": [], "error": "Could not geocode the provided zip code."}) + "\n"
+                continue
+            unique, duplicates = [], []
+            for r in restaurants:
+                if r["place_id"] in seen_place_ids:
+                    duplicates.append(r["place_id"])
+                else:
+                    seen_place_ids.add(r["place_id"])
+                    unique.append(r)
+            yield json.dumps({"zip_code": zip_code, "restaurants": unique, "duplicate_place_ids": duplicates}) + "\n"
+
+    return StreamingResponse(ndjson_results(), media_type="application/x-ndjson")
+
+@app.get("/restaurants/cache/stats")
+def get_restaurant_cache_stats(current_user: dict = Depends(get_current_user)):
+    stats = restaurant_cache.stats()
+    stats["data_source"] = fastapi_config.RESTAURANTS_DATA_SOURCE
+    stats["snapshot"] = restaurant_snapshot.stats()
+    stats["single_flight"] = restaurant_flights.stats()
+    return stats
+
+@app.get("/restaurants/nearest")
+async def get_nearest_restaurants(zip_code: str, k: int = 10, current_user: dict = Depends(get_current_user)):
+    # Answered only from the restaurant_details snapshot; there is no live equivalent.
+    if not restaurant_snapshot.is_fresh():
+        raise HTTPException(status_code=503, detail="Restaurant snapshot is not loaded.")
+    coords = await geocode_zip_code_async(zip_code)
+    if not coords:
+        raise HTTPException(status_code=404, detail="Could not geocode the provided zip code.")
+    return {"restaurants": restaurant_snapshot.query_nearest(coords["lat"], coords["lng"], k)}
+
+@app.on_event("startup")
+def start_restaurant_snapshot():
+    if fastapi_config.RESTAURANTS_DATA_SOURCE == "snapshot":
+        restaurant_snapshot.start()
+
+@app.on_event("shutdown")
+def stop_restaurant_snapshot():
+    restaurant_snapshot.stop()
+
+@app.on_event("startup")
+def start_regulation_mirror():
+    if fastapi_config.VECTOR_MIRROR_ENABLED:
+        regulation_mirror.start()
+
+@app.on_event("shutdown")
+def stop_regulation_mirror():
+    regulation_mirror.stop()
+
+@app.on_event("startup")
+def start_faq_store():
+    if fastapi_config.FAQ_ENABLED:
+        faq_store.start()
+    if fastapi_config.QUERY_LOG_ENABLED:
+        query_log.start()
+
+@app.on_event("shutdown")
+def stop_faq_store():
+    faq_store.stop()
+    if fastapi_config.QUERY_LOG_ENABLED:
+        query_log.stop()
+
+@app.on_event("startup")
+def start_regulation_lexical_index():
+    if fastapi_config.HYBRID_SEARCH_ENABLED:
+        regulation_lexical.start()
+
+@app.on_event("shutdown")
+def stop_regulation_lexical_index():
+    regulation_lexical.stop()
+
+@app.exception_handler(RateLimitError)
+def rate_limit_exception_handler(request, exc: RateLimitError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+@app.exception_handler(PlacesApiError)
+def places_api_exception_handler(request, exc: PlacesApiError):
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
+@app.get("/ask/cache/stats")
+def get_ask_cache_stats():
+    return {
+        "embeddings": embedding_cache.stats(),
+        "answers": answer_cache.stats(),
+        "vector_mirror": regulation_mirror.stats(),
+        "bm25": regulation_lexical.stats(),
+        "faq": faq_store.stats(),
+    }
+
+@app.get("/ask/metrics")
+def get_ask_metrics():
+    return {"stages": regulation_metrics.stats(), "reranker": reranker.stats()}
+
+@app.post("/ask/cache/invalidate")
+def invalidate_ask_cache(current_user: dict = Depends(get_current_user)):
+    answer_cache.invalidate()
+    return {"message": "Answer cache cleared."}
+
+@app.get("/places/quota")
+def get_places_quota(current_user: dict = Depends(get_current_user)):
+    return places_governor.stats()
+
+@app.get("/http/stats")
+def get_http_stats(current_user: dict = Depends(get_current_user)):
+    stats = http_client.stats()
+    stats["async"] = async_http_client.stats()
+    return stats
+
+@app.get("/executors/stats")
+def get_executor_stats(current_user: dict = Depends(get_current_user)):
+    return {e.name: e.stats() for e in (snowflake_executor, pinecone_executor, places_executor, agent_executor)}
+
+@app.on_event("shutdown")
+async def close_http_client():
+    http_client.close()
+    await async_http_client.aclose()
+    for executor in (snowflake_executor, pinecone_executor, places_executor, agent_executor):
+        executor.shutdown()
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 @app.get("/get_news")
 async def root():
-    return get_news("Find the latest trends in small business technology.")
+    return await run_in_threadpool(get_news, "Find the latest trends in small business technology.")
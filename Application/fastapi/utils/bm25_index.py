@@ -0,0 +1,127 @@
+# damg7245_final_project/Application/fastapi/utils/bm25_index.py
+#
+# Standard library + NumPy only: the Airflow mass_gov DAG imports this same file
+# (it is mounted into the Airflow plugins folder) to build the index the API
+# loads, so both sides share one tokenizer and one on-disk format.
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+META_FILE = "bm25_meta.json"
+POSTINGS_FILE = "bm25_postings.bin"
+POSTING_DTYPE = np.dtype([("doc", "<u4"), ("tf", "<u4")])
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+# "105 CMR 590.003" -> also index "105cmr590" and "105cmr590.003" so citations match
+# exactly and a question citing a whole chapter still finds its sections.
+_CITATION = re.compile(r"\b(\d+)\s*(cmr|cfr|mgl|usc)\s*(\d+(?:\.\d+)*)")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower()
+    tokens = [t for t in _TOKEN.findall(text) if t not in _STOPWORDS]
+    for title, code, section in _CITATION.findall(text):
+        parts = section.split(".")
+        tokens.extend(f"{title}{code}{'.'.join(parts[:i])}" for i in range(1, len(parts) + 1))
+    return tokens
+
+
+def term_frequencies(text: str) -> Dict[str, int]:
+    return dict(Counter(tokenize(text)))
+
+
+def write_index(directory: str, docs: Dict[str, Dict], k1: float = 1.5, b: float = 0.75):
+    """
+    Writes an index over `docs` ({doc_id: {"tf": {term: count}, "length": int,
+    "snippet": str}}): postings as one contiguous (doc, tf) array per term, plus
+    a JSON header with the term offsets and per-document data.
+    """
+    doc_ids = sorted(docs)
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc_number, doc_id in enumerate(doc_ids):
+        for term, tf in docs[doc_id]["tf"].items():
+            postings.setdefault(term, []).append((doc_number, tf))
+
+    terms, offset = {}, 0
+    array = np.zeros(sum(len(p) for p in postings.values()), dtype=POSTING_DTYPE)
+    for term in sorted(postings):
+        entries = postings[term]
+        array[offset:offset + len(entries)] = entries
+        terms[term] = [offset, len(entries)]
+        offset += len(entries)
+
+    lengths = [docs[d]["length"] for d in doc_ids]
+    meta = {
+        "k1": k1,
+        "b": b,
+        "avgdl": sum(lengths) / len(lengths) if lengths else 0.0,
+        "docs": [{"id": d, "length": docs[d]["length"], "snippet": docs[d].get("snippet", "")} for d in doc_ids],
+        "terms": terms,
+    }
+    os.makedirs(directory, exist_ok=True)
+    array.tofile(os.path.join(directory, POSTINGS_FILE))
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+class BM25Index:
+    """Read side of `write_index`; postings stay memory-mapped and are scored with NumPy."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.avgdl = meta["avgdl"] or 1.0
+        self.doc_ids = [d["id"] for d in meta["docs"]]
+        self.snippets = {d["id"]: d["snippet"] for d in meta["docs"]}
+        self.lengths = np.array([d["length"] for d in meta["docs"]], dtype=np.float32)
+        self.terms = meta["terms"]
+        postings_path = os.path.join(directory, POSTINGS_FILE)
+        count = os.path.getsize(postings_path) // POSTING_DTYPE.itemsize
+        self.postings = np.memmap(postings_path, dtype=POSTING_DTYPE, mode="r", shape=(count,)) if count else \
+            np.zeros(0, dtype=POSTING_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        n = len(self.doc_ids)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / self.avgdl)
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            block = self.postings[entry[0]:entry[0] + entry[1]]
+            idf = math.log(1 + (n - entry[1] + 0.5) / (entry[1] + 0.5))
+            docs = block["doc"].astype(np.int64)
+            tf = block["tf"].astype(np.float32)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:top_k]]
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60,
+                           limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Fuses ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ordered[:limit] if limit is not None else ordered
@@ -0,0 +1,149 @@
+# damg7245_final_project/Application/fastapi/utils/embedding_cache.py
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(text: str, model: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class _DiskTier:
+    # Append-only file of fixed-width records: 32-byte key digest + float32[dim].
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype([("key", "S32"), ("vector", "<f4", (dim,))])
+        self.rows: Dict[bytes, int] = {}
+        self._map: Optional[np.memmap] = None
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % self.dtype.itemsize:
+            # A record torn by a crash mid-append would shift every record appended after it.
+            try:
+                with open(path, "r+b") as f:
+                    f.truncate(size - size % self.dtype.itemsize)
+            except OSError as e:
+                logger.warning(f"Could not drop the torn record at the end of {path}: {e}")
+        if size >= self.dtype.itemsize:
+            self._remap()
+            # np.bytes_ strips trailing NUL bytes; pad back to the full 32-byte digest.
+            self.rows = {bytes(key).ljust(32, b"\0"): row for row, key in enumerate(self._map["key"])}
+
+    def _remap(self):
+        count = os.path.getsize(self.path) // self.dtype.itemsize
+        self._map = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        if self._map is None or row >= len(self._map):
+            self._remap()
+        return np.array(self._map[row]["vector"])
+
+    def put(self, key: bytes, vector: np.ndarray):
+        if key in self.rows or vector.shape != (self.dim,):
+            return
+        record = np.zeros(1, dtype=self.dtype)
+        record["key"] = key
+        record["vector"] = vector
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            if offset % self.dtype.itemsize:
+                offset -= offset % self.dtype.itemsize
+                f.truncate(offset)
+                f.seek(0, os.SEEK_END)
+            f.write(record.tobytes())
+        self.rows[key] = offset // self.dtype.itemsize
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings keyed by normalized text and model name:
+    an in-memory LRU in front of a persistent, memory-mapped float32 file per
+    model, so a restarted worker keeps its hits.
+    """
+
+    def __init__(self, directory: Optional[str], max_memory_entries: int = 4096, dim: int = 1536):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.dim = dim
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk: Dict[str, _DiskTier] = {}
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _disk_tier(self, model: str) -> Optional[_DiskTier]:
+        if not self.directory:
+            return None
+        tier = self._disk.get(model)
+        if tier is None:
+            filename = re.sub(r"[^A-Za-z0-9_.-]", "_", model) + ".f32"
+            tier = _DiskTier(os.path.join(self.directory, filename), self.dim)
+            self._disk[model] = tier
+        return tier
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        key = cache_key(text, model)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return vector.tolist()
+            tier = self._disk_tier(model)
+            vector = tier.get(key) if tier is not None else None
+            if vector is not None:
+                self._remember(key, vector)
+                self._counters["disk_hits"] += 1
+                return vector.tolist()
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, text: str, model: str, vector: List[float]):
+        key = cache_key(text, model)
+        array = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, array)
+            tier = self._disk_tier(model)
+            if tier is not None:
+                try:
+                    tier.put(key, array)
+                except OSError as e:
+                    logger.warning(f"Could not persist embedding to {tier.path}: {e}")
+
+    def get_or_create(self, text: str, model: str, embed: Callable[[str], List[float]]) -> List[float]:
+        vector = self.get(text, model)
+        if vector is None:
+            vector = embed(text)
+            self.put(text, model, vector)
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = sum(len(tier.rows) for tier in self._disk.values())
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
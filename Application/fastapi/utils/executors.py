@@ -0,0 +1,62 @@
+# damg7245_final_project/Application/fastapi/utils/executors.py
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class BlockingExecutor:
+    """
+    A dedicated, fixed-size thread pool for one blocking dependency (Snowflake,
+    Pinecone, the Places pipeline, ...), awaitable from async routes. Each
+    dependency gets its own pool, so a slow one queues its own callers instead
+    of using up the threads every other route shares.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def _call(self, fn: Callable[..., Any]) -> Any:
+        try:
+            return fn()
+        except BaseException:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+
+    def _done(self, future: Future):
+        # A done-callback rather than a `finally` in _call: queued calls cancelled
+        # before they start never enter _call.
+        with self._lock:
+            self._counters["in_flight"] -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["in_flight"] += 1
+            self._counters["max_in_flight"] = max(self._counters["max_in_flight"], self._counters["in_flight"])
+        try:
+            future = self._executor.submit(self._call, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._counters["in_flight"] -= 1
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        # `in_flight` counts queued calls too; anything above max_workers is waiting.
+        stats["max_workers"] = self.max_workers
+        stats["queued"] = max(0, stats["in_flight"] - self.max_workers)
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,136 @@
+# damg7245_final_project/Application/fastapi/utils/faq_store.py
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class _FaqState:
+    def __init__(self, version: str, entries: List[Dict[str, Any]]):
+        self.version = version
+        self.entries = entries
+        self.by_text = {normalize_text(e["question"]): e for e in entries}
+        matrix = np.asarray([e["embedding"] for e in entries], dtype=np.float32).reshape(len(entries), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1, norms)
+
+
+class FaqAnswerStore:
+    """
+    Answers precomputed off-peak by the mass_gov DAG for curated and frequently
+    asked regulation questions. The DAG publishes each build as a versioned
+    artifact and points s3://`bucket`/`pointer_key` at it; this store follows the
+    pointer every `refresh_interval_seconds` and keeps the last artifact on disk.
+
+    `match_text` hits on the normalized question alone, before any embedding is
+    made; `match_vector` accepts paraphrases at cosine >= `threshold`.
+    """
+
+    def __init__(self, s3_client: Callable[[], Any], bucket: str, pointer_key: str, path: Optional[str],
+                 refresh_interval_seconds: float, threshold: float = 0.95):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.pointer_key = pointer_key
+        self.path = path
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.threshold = threshold
+        self._state: Optional[_FaqState] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._counters = {"text_hits": 0, "vector_hits": 0, "misses": 0}
+        self._loaded_at: Optional[float] = None
+        if path:
+            self._load_local()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="faq-store", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"FAQ answer refresh failed: {e}")
+            self._stop.wait(self.refresh_interval_seconds)
+
+    def refresh(self):
+        client = self.s3_client()
+        pointer = json.loads(client.get_object(Bucket=self.bucket, Key=self.pointer_key)["Body"].read())
+        if self._state is not None and pointer["version"] == self._state.version:
+            return
+        raw = client.get_object(Bucket=self.bucket, Key=pointer["key"])["Body"].read()
+        self._publish(json.loads(gzip.decompress(raw)))
+        if self.path:
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(raw)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write FAQ answers to {self.path}: {e}")
+
+    def _publish(self, artifact: Dict[str, Any]):
+        self._state = _FaqState(artifact["version"], artifact["entries"])
+        self._loaded_at = time.time()
+        logger.info(f"Loaded {len(artifact['entries'])} FAQ answers (version {artifact['version']}).")
+
+    def _load_local(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self._publish(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable FAQ answers {self.path}: {e}")
+
+    @staticmethod
+    def _result(entry: Dict[str, Any], version: str, similarity: float) -> Dict[str, Any]:
+        return {"answer": entry["answer"], "context_ids": entry["context_ids"], "faq_question": entry["question"],
+                "faq_version": version, "similarity": similarity}
+
+    def match_text(self, question: str) -> Optional[Dict[str, Any]]:
+        state = self._state
+        entry = state.by_text.get(normalize_text(question)) if state is not None else None
+        if entry is None:
+            return None
+        self._counters["text_hits"] += 1
+        return self._result(entry, state.version, 1.0)
+
+    def match_vector(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        state = self._state
+        if state is None or not state.entries:
+            self._counters["misses"] += 1
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        similarities = state.matrix @ (query / norm if norm else query)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self._counters["misses"] += 1
+            return None
+        self._counters["vector_hits"] += 1
+        return self._result(state.entries[best], state.version, float(similarities[best]))
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        stats = dict(self._counters)
+        stats["entries"] = len(state.entries) if state is not None else 0
+        stats["version"] = state.version if state is not None else None
+        stats["loaded_age_seconds"] = time.time() - self._loaded_at if self._loaded_at is not None else None
+        return stats
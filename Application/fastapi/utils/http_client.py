@@ -0,0 +1,185 @@
+# damg7245_final_project/Application/fastapi/utils/http_client.py
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _as_requests_error(e: Exception) -> requests.RequestException:
+    if isinstance(e, httpx.TimeoutException):
+        return requests.Timeout(str(e))
+    if isinstance(e, httpx.ConnectError):
+        return requests.ConnectionError(str(e))
+    return requests.RequestException(str(e))
+
+
+class _HostStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, float]] = defaultdict(lambda: {"requests": 0, "errors": 0, "total_seconds": 0.0})
+
+    def record(self, host: str, seconds: float, failed: bool):
+        with self._lock:
+            host_stats = self._hosts[host]
+            host_stats["requests"] += 1
+            host_stats["errors"] += int(failed)
+            host_stats["total_seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                host: dict(s, avg_seconds=s["total_seconds"] / s["requests"] if s["requests"] else 0.0)
+                for host, s in self._hosts.items()
+            }
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client. Connections are kept alive and pooled per host,
+    every request gets a connect/read timeout unless the caller passes one, and
+    HTTP/2 is used when httpx and h2 are installed (falling back to a pooled
+    requests.Session otherwise).
+
+    Errors are raised as requests exceptions whichever backend is active, so
+    callers only need to handle `requests.RequestException`.
+    """
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 pool_maxsize: int = 20, http2: bool = True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if self.http2:
+            self._client = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_maxsize),
+            )
+        else:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+        self._hosts = _HostStats()
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Timeout] = None):
+        timeout = timeout if timeout is not None else self.timeout
+        host = urlsplit(url).netloc
+        started = time.perf_counter()
+        failed = False
+        try:
+            if self.http2:
+                return self._httpx_get(url, params, headers, timeout)
+            return self._session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            failed = True
+            raise
+        finally:
+            self._hosts.record(host, time.perf_counter() - started, failed)
+
+    def _httpx_get(self, url, params, headers, timeout):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            return self._client.get(url, params=params, headers=headers, timeout=timeout)
+        except httpx.HTTPError as e:
+            raise _as_requests_error(e) from e
+
+    def _pool_stats(self) -> Dict[str, Any]:
+        if self.http2:
+            connections = self._client._transport._pool.connections
+            return {
+                "connections": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+            }
+        pools = {}
+        pool_manager = self._session.get_adapter("https://").poolmanager
+        for pool_key in pool_manager.pools.keys():
+            pool = pool_manager.pools[pool_key]
+            port = f":{pool_key.key_port}" if pool_key.key_port else ""
+            pools[f"{pool_key.key_scheme}://{pool_key.key_host}{port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        return pools
+
+    def stats(self) -> Dict[str, Any]:
+        hosts = self._hosts.snapshot()
+        try:
+            pool = self._pool_stats()
+        except AttributeError as e:
+            # Pool internals differ between library versions; the per-host counters above still hold.
+            logger.debug(f"Connection pool stats unavailable: {e}")
+            pool = None
+        return {"backend": "httpx-http2" if self.http2 else "requests", "hosts": hosts, "pool": pool}
+
+    def close(self):
+        if self.http2:
+            self._client.close()
+        else:
+            self._session.close()
+
+
+class AsyncHttpClient:
+    """
+    Async counterpart of HttpClient for `async def` routes: one httpx.AsyncClient
+    with the same default timeouts, HTTP/2 when h2 is installed, and errors
+    raised as requests exceptions.
+    """
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 pool_maxsize: int = 20, http2: bool = True):
+        if httpx is None:
+            raise ImportError("AsyncHttpClient requires httpx.")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            follow_redirects=True,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_maxsize),
+        )
+        self._hosts = _HostStats()
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[Timeout] = None):
+        kwargs = {}
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout[1], connect=timeout[0]) if isinstance(timeout, tuple) else timeout
+        host = urlsplit(url).netloc
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await self._client.get(url, params=params, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            failed = True
+            raise _as_requests_error(e) from e
+        finally:
+            self._hosts.record(host, time.perf_counter() - started, failed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "httpx-async-http2" if self.http2 else "httpx-async", "hosts": self._hosts.snapshot()}
+
+    async def aclose(self):
+        await self._client.aclose()
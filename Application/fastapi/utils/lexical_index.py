@@ -0,0 +1,103 @@
+# damg7245_final_project/Application/fastapi/utils/lexical_index.py
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from utils.bm25_index import META_FILE, POSTINGS_FILE, BM25Index
+
+logger = logging.getLogger(__name__)
+
+
+class LexicalIndexSync:
+    """
+    Keeps a local copy of the BM25 index the Airflow pipeline publishes to
+    s3://`bucket`/`prefix`. A background thread checks the header's ETag every
+    `refresh_interval_seconds` and downloads both files only when it changed;
+    the index is loaded from `directory` at startup so a restart can search
+    before S3 is reachable.
+    """
+
+    def __init__(self, s3_client: Callable[[], Any], bucket: str, prefix: str, directory: str,
+                 refresh_interval_seconds: float):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.directory = directory
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.index: Optional[BM25Index] = None
+        self._etag: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._load_local()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="bm25-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except (ClientError, OSError, ValueError) as e:
+                logger.error(f"BM25 index refresh failed: {e}")
+            self._stop.wait(self.refresh_interval_seconds)
+
+    def refresh(self):
+        client = self.s3_client()
+        meta_key = f"{self.prefix}{META_FILE}"
+        etag = client.head_object(Bucket=self.bucket, Key=meta_key)["ETag"]
+        if etag == self._etag:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name in (POSTINGS_FILE, META_FILE):
+            client.download_file(self.bucket, f"{self.prefix}{name}", os.path.join(self.directory, f"{name}.tmp"))
+        # Replacing the files leaves the current index's memory map on the old inode.
+        for name in (POSTINGS_FILE, META_FILE):
+            os.replace(os.path.join(self.directory, f"{name}.tmp"), os.path.join(self.directory, name))
+        if self._load_local():
+            self._etag = etag
+
+    def _load_local(self) -> bool:
+        if not os.path.exists(os.path.join(self.directory, META_FILE)):
+            return False
+        try:
+            index = BM25Index(self.directory)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable BM25 index in {self.directory}: {e}")
+            return False
+        expected = max((start + count for start, count in index.terms.values()), default=0)
+        if len(index.postings) != expected:
+            # Caught between two pipeline uploads; the next refresh will download a matching pair.
+            logger.warning("BM25 postings do not match the index header; keeping the previous index.")
+            return False
+        self.index = index
+        self._loaded_at = time.time()
+        logger.info(f"Loaded BM25 index over {len(index)} documents.")
+        return True
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        index = self.index
+        return index.search(query, top_k) if index is not None else []
+
+    def snippet(self, doc_id: str) -> str:
+        index = self.index
+        return index.snippets.get(doc_id, "") if index is not None else ""
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index
+        return {
+            "documents": len(index) if index is not None else 0,
+            "terms": len(index.terms) if index is not None else 0,
+            "loaded_age_seconds": time.time() - self._loaded_at if self._loaded_at is not None else None,
+        }
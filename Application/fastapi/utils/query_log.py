@@ -0,0 +1,95 @@
+# damg7245_final_project/Application/fastapi/utils/query_log.py
+
+import json
+import logging
+import os
+import socket
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from utils.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLog:
+    """
+    Counts the regulation questions this worker receives and flushes the counts
+    to s3://`bucket`/`prefix`<YYYY-MM-DD>/<host>-<pid>-<time>.json every
+    `flush_interval_seconds`. The mass_gov DAG sums these files to pick the most
+    frequent questions for the precomputed FAQ answers.
+
+    When `enabled` is false `record` does nothing. At most about `max_keys`
+    distinct questions are held between flushes (the least asked are dropped
+    first), so a long S3 outage cannot grow the worker without bound.
+    """
+
+    def __init__(self, s3_client: Callable[[], Any], bucket: str, prefix: str, flush_interval_seconds: float,
+                 enabled: bool = True, max_keys: int = 10000):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.flush_interval_seconds = flush_interval_seconds
+        self.enabled = enabled
+        self.max_keys = max_keys
+        self._counts: Counter = Counter()
+        self._questions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def record(self, question: str):
+        if not self.enabled:
+            return
+        key = normalize_text(question)
+        if not key:
+            return
+        with self._lock:
+            self._counts[key] += 1
+            self._questions[key] = question.strip()
+            self._trim()
+
+    def _trim(self):
+        # Called with the lock held. Trims back to `max_keys` only once 10% over, so
+        # the sort runs once per ~max_keys/10 new questions rather than on every one.
+        if len(self._counts) <= self.max_keys + self.max_keys // 10:
+            return
+        self._counts = Counter(dict(self._counts.most_common(self.max_keys)))
+        self._questions = {key: self._questions[key] for key in self._counts}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, questions = self._counts, self._questions
+            self._counts, self._questions = Counter(), {}
+        if not counts:
+            return
+        now = datetime.now(timezone.utc)
+        key = f"{self.prefix}{now:%Y-%m-%d}/{socket.gethostname()}-{os.getpid()}-{now:%H%M%S}.json"
+        body = {key_text: {"question": questions[key_text], "count": count} for key_text, count in counts.items()}
+        try:
+            self.s3_client().put_object(Bucket=self.bucket, Key=key, Body=json.dumps({"counts": body}),
+                                        ContentType="application/json")
+        except Exception as e:
+            logger.warning(f"Could not flush query log to s3://{self.bucket}/{key}: {e}")
+            with self._lock:
+                # Keep the counts for the next flush.
+                self._counts.update(counts)
+                for key_text, question in questions.items():
+                    self._questions.setdefault(key_text, question)
+                self._trim()
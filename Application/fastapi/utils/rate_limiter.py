@@ -0,0 +1,175 @@
+# damg7245_final_project/Application/fastapi/utils/rate_limiter.py
+#
+# Standard library only: the Airflow places DAG imports this same file (it is
+# mounted into the Airflow plugins folder), so it must not depend on the API's
+# config or packages.
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+logger = logging.getLogger(__name__)
+
+# Google Maps Platform statuses that mean "slow down" vs. "stop for today".
+THROTTLED_STATUSES = {"OVER_QUERY_LIMIT", "RESOURCE_EXHAUSTED", "429"}
+EXHAUSTED_STATUSES = {"OVER_DAILY_LIMIT"}
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class RateLimitTimeout(RateLimitError):
+    pass
+
+
+class QuotaExceeded(RateLimitError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        # `_updated` sits in the future while the bucket is paused.
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._updated = self._paused_until
+            self._tokens = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class QuotaGovernor:
+    """
+    Rate control for Google Places calls: one token bucket per endpoint
+    (e.g. 'nearbysearch', 'details'), a daily request ceiling shared by all of
+    them, and adaptive backoff.
+
+    Callers `acquire(endpoint)` before each request and `report(endpoint, status)`
+    with the API status afterwards. A throttled status halves that endpoint's rate
+    (down to `min_rate_fraction` of its budget) and pauses it with exponential
+    backoff; successful calls win the rate back additively, so throughput settles
+    just under whatever Google is actually allowing.
+    """
+
+    def __init__(self, budgets_qps: Dict[str, float], daily_quota: Optional[int] = None,
+                 quota_timezone: str = "America/Los_Angeles", min_rate_fraction: float = 0.1,
+                 recovery_per_success: float = 0.05, max_backoff_seconds: float = 60.0):
+        self.budgets_qps = dict(budgets_qps)
+        self.daily_quota = daily_quota or None
+        # Google resets daily quotas at midnight Pacific time.
+        self.quota_tz = ZoneInfo(quota_timezone) if ZoneInfo else None
+        self.min_rate_fraction = min_rate_fraction
+        self.recovery_per_success = recovery_per_success
+        self.max_backoff_seconds = max_backoff_seconds
+        self._buckets = {name: TokenBucket(qps) for name, qps in self.budgets_qps.items()}
+        self._consecutive_throttles = {name: 0 for name in self.budgets_qps}
+        self._lock = threading.Lock()
+        self._quota_day = self._today()
+        self._used_today = 0
+        self._exhausted_day = None
+        self._counters = {name: {"requests": 0, "throttled": 0, "errors": 0} for name in self.budgets_qps}
+
+    def _today(self):
+        return datetime.now(self.quota_tz).date()
+
+    def acquire(self, endpoint: str, timeout: Optional[float] = None):
+        with self._lock:
+            today = self._today()
+            if today != self._quota_day:
+                self._quota_day, self._used_today = today, 0
+            if self._exhausted_day == today:
+                raise QuotaExceeded("Google Places daily quota reported exhausted.")
+            if self.daily_quota is not None and self._used_today >= self.daily_quota:
+                raise QuotaExceeded(f"Daily Google Places quota of {self.daily_quota} requests reached.")
+            # Reserve the request now so concurrent callers cannot overshoot the ceiling.
+            self._used_today += 1
+            self._counters[endpoint]["requests"] += 1
+        if not self._buckets[endpoint].acquire(timeout):
+            with self._lock:
+                self._used_today -= 1
+                self._counters[endpoint]["requests"] -= 1
+            raise RateLimitTimeout(f"No {endpoint} rate-limit token available within {timeout}s.")
+
+    def report(self, endpoint: str, status: Optional[str]):
+        bucket = self._buckets[endpoint]
+        budget = self.budgets_qps[endpoint]
+        status = str(status) if status is not None else None
+        if status in EXHAUSTED_STATUSES:
+            with self._lock:
+                self._exhausted_day = self._today()
+            logger.error(f"Google Places reported {status}; blocking calls until the quota resets.")
+            return
+        if status in THROTTLED_STATUSES:
+            with self._lock:
+                self._counters[endpoint]["throttled"] += 1
+                self._consecutive_throttles[endpoint] += 1
+                backoff = min(self.max_backoff_seconds, 2 ** (self._consecutive_throttles[endpoint] - 1))
+            bucket.set_rate(max(budget * self.min_rate_fraction, bucket.rate / 2))
+            bucket.pause(backoff)
+            logger.warning(f"{endpoint} throttled ({status}); rate now {bucket.rate:.2f}/s, pausing {backoff:.0f}s.")
+            return
+        with self._lock:
+            self._consecutive_throttles[endpoint] = 0
+        if bucket.rate < budget:
+            bucket.set_rate(min(budget, bucket.rate + budget * self.recovery_per_success))
+
+    def report_error(self, endpoint: str):
+        """For responses with no usable status (e.g. a non-JSON error page): counted, no rate change."""
+        with self._lock:
+            self._counters[endpoint]["errors"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "used_today": self._used_today,
+                "daily_quota": self.daily_quota,
+                "exhausted": self._exhausted_day == self._today(),
+                "endpoints": {
+                    name: dict(self._counters[name], rate_qps=round(self._buckets[name].rate, 3),
+                               budget_qps=self.budgets_qps[name])
+                    for name in self.budgets_qps
+                },
+            }
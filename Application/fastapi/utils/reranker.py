@@ -0,0 +1,90 @@
+# damg7245_final_project/Application/fastapi/utils/reranker.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieval candidates with a small cross-encoder run locally on CPU.
+    Pairs are scored in batches, and scores are cached per (normalized query,
+    chunk id, chunk text), so repeated questions only pay for new chunks.
+
+    sentence-transformers is optional; without it `available` is False and
+    callers keep the retrieval order.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 16, max_cache_entries: int = 10000):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_cache_entries = max_cache_entries
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._scores: "OrderedDict[bytes, float]" = OrderedDict()
+        self._counters = {"pairs_scored": 0, "cache_hits": 0}
+
+    @property
+    def available(self) -> bool:
+        return CrossEncoder is not None
+
+    def _get_model(self):
+        # Loaded on first use: the model download and load take seconds.
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logger.info(f"Loaded cross-encoder {self.model_name}.")
+        return self._model
+
+    @staticmethod
+    def _key(query: str, match: Dict[str, Any]) -> bytes:
+        content = match["metadata"].get("content") or ""
+        return hashlib.sha256(f"{normalize_text(query)}\0{match['id']}\0{content}".encode("utf-8")).digest()
+
+    def rerank(self, query: str, matches: List[Dict[str, Any]], keep: int) -> List[Dict[str, Any]]:
+        if not matches:
+            return []
+        keys = [self._key(query, m) for m in matches]
+        scores: List[Optional[float]] = []
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    self._counters["cache_hits"] += 1
+                scores.append(score)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            pairs = [(query, matches[i]["metadata"].get("content") or "") for i in missing]
+            predicted = self._get_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            with self._lock:
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    self._scores[keys[i]] = scores[i]
+                self._counters["pairs_scored"] += len(missing)
+                while len(self._scores) > self.max_cache_entries:
+                    self._scores.popitem(last=False)
+        ranked = sorted(zip(scores, range(len(matches))), key=lambda item: item[0], reverse=True)
+        return [dict(matches[i], rerank_score=score) for score, i in ranked[:keep]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["cached_scores"] = len(self._scores)
+        stats["model"] = self.model_name
+        stats["available"] = self.available
+        stats["loaded"] = self._model is not None
+        return stats
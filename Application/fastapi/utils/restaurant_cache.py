@@ -0,0 +1,113 @@
+# damg7245_final_project/Application/fastapi/utils/restaurant_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, int]
+Loader = Callable[[str, int], Optional[List[Dict[str, Any]]]]
+
+
+class RestaurantCache:
+    """
+    Server-side cache of restaurant lists keyed on (zip_code, radius_meters).
+
+    Entries younger than `ttl_seconds` are served as-is. Entries that are older but
+    still within `stale_ttl_seconds` past the TTL are served immediately while a
+    background refresh reloads them. Anything older is a miss and is loaded inline.
+    At most `max_entries` keys are kept, evicting the least recently used.
+    Loader results of None and loader exceptions are never stored; a failed
+    background refresh keeps the existing entry.
+    """
+
+    def __init__(self, loader: Loader, ttl_seconds: float, stale_ttl_seconds: float,
+                 max_entries: int, refresh_workers: int = 2):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="restaurant-cache")
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "evictions": 0,
+        }
+
+    def get(self, zip_code: str, radius_meters: int) -> Optional[List[Dict[str, Any]]]:
+        key = (zip_code, radius_meters)
+        restaurants = self.peek(zip_code, radius_meters)
+        if restaurants is not None:
+            return restaurants
+        restaurants = self.loader(zip_code, radius_meters)
+        if restaurants is not None:
+            self._store(key, restaurants)
+        return restaurants
+
+    def peek(self, zip_code: str, radius_meters: int) -> Optional[List[Dict[str, Any]]]:
+        """Like `get`, but returns None on a miss instead of loading inline."""
+        key = (zip_code, radius_meters)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry[1]
+                if age < self.ttl_seconds + self.stale_ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._refresh, key)
+                    return entry[1]
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, zip_code: str, radius_meters: int, restaurants: List[Dict[str, Any]]):
+        """Stores a result loaded outside `get`, e.g. by a streamed live lookup."""
+        self._store((zip_code, radius_meters), restaurants)
+
+    def _refresh(self, key: CacheKey):
+        try:
+            restaurants = self.loader(*key)
+            if restaurants is not None:
+                self._store(key, restaurants)
+            with self._lock:
+                self._counters["refreshes"] += 1
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+            with self._lock:
+                self._counters["refresh_failures"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: CacheKey, restaurants: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), restaurants)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["refreshing"] = len(self._refreshing)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
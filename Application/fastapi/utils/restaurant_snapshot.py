@@ -0,0 +1,179 @@
+# damg7245_final_project/Application/fastapi/utils/restaurant_snapshot.py
+
+import ast
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.spatial_index import SpatialIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_types(value: Any) -> List[str]:
+    # The DAG round-trips `types` through CSV, so it can arrive as a list, a JSON
+    # array string or a Python repr of a list.
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return []
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(value)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(parsed, str):
+            return _parse_types(parsed)
+        if isinstance(parsed, list):
+            return [str(t) for t in parsed]
+    return []
+
+
+def _to_restaurant(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    row = {k.lower(): v for k, v in row.items()}
+    if row.get("latitude") is None or row.get("longitude") is None:
+        return None
+    if row.get("business_status") == "CLOSED_PERMANENTLY":
+        return None
+    types = _parse_types(row.get("types"))
+    return {
+        "name": row.get("name"),
+        "address": row.get("address"),
+        "rating": row.get("rating"),
+        "user_ratings_total": row.get("user_ratings_total"),
+        "price_level": None,
+        "place_id": row.get("place_id"),
+        "lat": float(row["latitude"]),
+        "lng": float(row["longitude"]),
+        "cuisine_types": [t for t in types if t != "restaurant"] or ["N/A"],
+        "website": None,
+    }
+
+
+class RestaurantSnapshot:
+    """
+    Local copy of the Airflow-loaded restaurant_details table, reloaded every
+    `refresh_interval_seconds` by a background thread and answered from memory.
+    The last snapshot is also kept on disk so a restart can serve before the
+    first reload completes. A reload that returns no restaurants, or fewer than
+    `min_keep_ratio` of the current count (a truncated table mid-load), is
+    rejected and the current snapshot kept.
+    """
+
+    def __init__(self, fetch_rows: Callable[[], List[Dict[str, Any]]], refresh_interval_seconds: float,
+                 max_age_seconds: float, result_limit: int = 60, path: Optional[str] = None,
+                 min_keep_ratio: float = 0.5):
+        self.fetch_rows = fetch_rows
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self.result_limit = result_limit
+        self.path = path
+        self.min_keep_ratio = min_keep_ratio
+        self.rejected_refreshes = 0
+        self.restaurants: List[Dict[str, Any]] = []
+        self.data_time: Optional[float] = None
+        self.index = SpatialIndex()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if path:
+            self._load_local()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="restaurant-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Restaurant snapshot refresh failed: {e}")
+            self._stop.wait(self.refresh_interval_seconds)
+
+    def refresh(self):
+        rows = self.fetch_rows()
+        restaurants = [r for r in (_to_restaurant(row) for row in rows) if r is not None]
+        if not restaurants or len(restaurants) < self.min_keep_ratio * len(self.restaurants):
+            self.rejected_refreshes += 1
+            logger.warning(f"Rejected restaurant snapshot reload with {len(restaurants)} restaurants; "
+                           f"keeping the current {len(self.restaurants)}.")
+            return
+        insert_dates = [row.get("INSERT_DATE") or row.get("insert_date") for row in rows]
+        insert_dates = [d for d in insert_dates if isinstance(d, datetime)]
+        if insert_dates:
+            latest = max(insert_dates)
+            # The DAG stamps rows with naive UTC timestamps.
+            data_time = (latest.replace(tzinfo=timezone.utc) if latest.tzinfo is None else latest).timestamp()
+        else:
+            # Without load timestamps the data's age is unknown, so it is never treated as fresh.
+            data_time = None
+        self._publish(restaurants, data_time)
+        logger.info(f"Loaded {len(restaurants)} restaurants into the local snapshot.")
+        if self.path:
+            self._save_local()
+
+    def _publish(self, restaurants: List[Dict[str, Any]], data_time: Optional[float]):
+        changes = self.index.update(
+            [r["place_id"] for r in restaurants],
+            [r["lat"] for r in restaurants],
+            [r["lng"] for r in restaurants],
+            items=restaurants,
+        )
+        logger.info(f"Restaurant index updated: {changes}")
+        self.restaurants = restaurants
+        self.data_time = data_time
+
+    def _save_local(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"data_time": self.data_time, "restaurants": self.restaurants}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write restaurant snapshot to {self.path}: {e}")
+
+    def _load_local(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            self._publish(data["restaurants"], data["data_time"])
+            logger.info(f"Loaded {len(self.restaurants)} restaurants from {self.path}.")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable restaurant snapshot {self.path}: {e}")
+
+    def is_fresh(self) -> bool:
+        return bool(self.restaurants) and self.data_time is not None and \
+            time.time() - self.data_time < self.max_age_seconds
+
+    def query_radius(self, lat: float, lng: float, radius_meters: float) -> List[Dict[str, Any]]:
+        """
+        Returns restaurants within `radius_meters`, most-reviewed first (as a stand-in
+        for Google's prominence ranking), capped at `result_limit`.
+        """
+        nearby, _ = self.index.query_radius(lat, lng, radius_meters)
+        nearby.sort(key=lambda r: r.get("user_ratings_total") or 0, reverse=True)
+        return nearby[:self.result_limit]
+
+    def query_nearest(self, lat: float, lng: float, k: int) -> List[Dict[str, Any]]:
+        nearest, distances = self.index.query_nearest(lat, lng, k)
+        return [dict(r, distance_meters=round(float(d), 1)) for r, d in zip(nearest, distances)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "restaurants": len(self.restaurants),
+            "data_age_seconds": time.time() - self.data_time if self.data_time is not None else None,
+            "fresh": self.is_fresh(),
+            "rejected_refreshes": self.rejected_refreshes,
+        }
@@ -0,0 +1,102 @@
+# damg7245_final_project/Application/fastapi/utils/semantic_cache.py
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by question embedding. A lookup returns the stored answer of the
+    most similar cached question when its cosine similarity reaches `threshold`,
+    so paraphrases of an answered question skip retrieval and the completion.
+
+    `corpus_version` is polled at most every `version_check_seconds`; when the value
+    it returns changes (the regulation index was re-ingested) every entry is dropped.
+    When full, the least recently used entry is replaced.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, dim: int = 1536,
+                 corpus_version: Optional[Callable[[], Hashable]] = None, version_check_seconds: float = 300.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.corpus_version = corpus_version
+        self.version_check_seconds = version_check_seconds
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._last_used = np.zeros(max_entries)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._size = 0
+        self._version: Hashable = None
+        self._version_checked = float("-inf")
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _check_version(self):
+        if self.corpus_version is None or time.monotonic() - self._version_checked < self.version_check_seconds:
+            return
+        self._version_checked = time.monotonic()
+        try:
+            version = self.corpus_version()
+        except Exception as e:
+            logger.warning(f"Could not read regulation corpus version: {e}")
+            return
+        if version != self._version:
+            if self._version is not None:
+                logger.info(f"Regulation corpus changed ({self._version} -> {version}); clearing answer cache.")
+                self.invalidate()
+            self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._last_used[:] = 0
+            self._size = 0
+            self._counters["invalidations"] += 1
+
+    def lookup(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        self._check_version()
+        query = self._normalize(vector)
+        with self._lock:
+            if self._size == 0:
+                self._counters["misses"] += 1
+                return None
+            similarities = self._vectors[:self._size] @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            self._last_used[best] = time.monotonic()
+            self._counters["hits"] += 1
+            return dict(self._entries[best], similarity=float(similarities[best]))
+
+    def store(self, question: str, vector: List[float], answer: str, context_ids: List[str]):
+        with self._lock:
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+            self._vectors[slot] = self._normalize(vector)
+            self._last_used[slot] = time.monotonic()
+            self._entries[slot] = {"question": question, "answer": answer, "context_ids": list(context_ids)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = self._size
+            stats["threshold"] = self.threshold
+            stats["corpus_version"] = str(self._version) if self._version is not None else None
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
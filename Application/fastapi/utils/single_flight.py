@@ -0,0 +1,61 @@
+# damg7245_final_project/Application/fastapi/utils/single_flight.py
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution: the first
+    caller runs the function, later callers block until it finishes and receive
+    the same result (or exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counters = {"executions": 0, "coalesced": 0, "max_waiters": 0}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["executions"] += 1
+            else:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                self._counters["max_waiters"] = max(self._counters["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -4,7 +4,7 @@ import snowflake.connector
 import pandas as pd
 from config import fastapi_config
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -60,3 +60,13 @@ class SnowflakeClient:
             cur.execute(insert_query, (username, hashed_password))
             self.conn.commit()
 
+    def get_restaurant_details(self) -> List[Dict[str, Any]]:
+        # Loaded daily by the massachusetts_restaurant_pipeline DAG.
+        query = """
+        SELECT PLACE_ID, NAME, ADDRESS, ZIP_CODE, LATITUDE, LONGITUDE, RATING,
+               USER_RATINGS_TOTAL, BUSINESS_STATUS, TYPES, INSERT_DATE
+        FROM RESTAURANT_DETAILS
+        """
+        with self.conn.cursor(snowflake.connector.DictCursor) as cur:
+            cur.execute(query)
+            return cur.fetchall()
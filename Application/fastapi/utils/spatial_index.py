@@ -0,0 +1,147 @@
+# damg7245_final_project/Application/fastapi/utils/spatial_index.py
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Cell keys are row * _KEY_STRIDE + col; the stride only has to exceed the column count.
+_KEY_STRIDE = 1 << 20
+
+
+def haversine_meters_vec(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat_r = np.radians(lat)
+    lats_r = np.radians(lats)
+    a = (np.sin((lats_r - lat_r) / 2) ** 2
+         + np.cos(lat_r) * np.cos(lats_r) * np.sin(np.radians(lngs - lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+class _GridState:
+    # Immutable once built; queries hold a reference so a concurrent update never
+    # swaps arrays out from under them.
+    def __init__(self, ids: np.ndarray, lats: np.ndarray, lngs: np.ndarray, keys: np.ndarray,
+                 items: Sequence[Any], order: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.items = items
+        self.lats = lats
+        self.lngs = lngs
+        self.keys = keys
+        self.order = np.argsort(keys, kind="stable") if order is None else order
+        self.sorted_keys = keys[self.order]
+
+
+class SpatialIndex:
+    """
+    Grid-bucket index over columnar latitude/longitude arrays.
+
+    Points are bucketed into fixed-size lat/lng cells and stored sorted by cell key,
+    so a radius query only touches the cells overlapping its bounding box (one
+    binary search per cell row) before an exact, vectorized haversine filter.
+    """
+
+    def __init__(self, cell_size_degrees: float = 0.02):
+        self.cell_size_degrees = cell_size_degrees
+        self._state: Optional[_GridState] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return 0 if self._state is None else len(self._state.ids)
+
+    def _cell_keys(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        rows = np.floor((lats + 90.0) / self.cell_size_degrees).astype(np.int64)
+        cols = np.floor((lngs + 180.0) / self.cell_size_degrees).astype(np.int64)
+        return rows * _KEY_STRIDE + cols
+
+    def update(self, ids: Sequence[str], lats: Sequence[float], lngs: Sequence[float],
+               items: Optional[Sequence[Any]] = None) -> Dict[str, int]:
+        """
+        Replaces the indexed points with `ids`/`lats`/`lngs`. Queries return the matching
+        entries of `items` (the ids themselves when omitted). Cell keys of points whose
+        coordinates did not change are reused. Returns counts of added, removed and
+        moved points.
+        """
+        items = list(ids) if items is None else items
+        ids = np.asarray(ids, dtype=object)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        with self._lock:
+            old = self._state
+            if old is None or len(old.ids) == 0:
+                self._state = _GridState(ids, lats, lngs, self._cell_keys(lats, lngs), items)
+                return {"added": len(ids), "removed": 0, "moved": 0}
+
+            old_rows = {place_id: row for row, place_id in enumerate(old.ids)}
+            prev = np.array([old_rows.get(place_id, -1) for place_id in ids], dtype=np.int64)
+            known = prev >= 0
+            same = known.copy()
+            same[known] = (old.lats[prev[known]] == lats[known]) & (old.lngs[prev[known]] == lngs[known])
+            changes = {
+                "added": int((~known).sum()),
+                "removed": len(old.ids) - int(known.sum()),
+                "moved": int((known & ~same).sum()),
+            }
+            if not any(changes.values()) and np.array_equal(prev, np.arange(len(old.ids))):
+                # Same points in the same rows: keep the sorted cell order, swap the items.
+                self._state = _GridState(old.ids, old.lats, old.lngs, old.keys, items, old.order)
+                return changes
+
+            keys = np.empty(len(ids), dtype=np.int64)
+            keys[same] = old.keys[prev[same]]
+            keys[~same] = self._cell_keys(lats[~same], lngs[~same])
+            self._state = _GridState(ids, lats, lngs, keys, items)
+            return changes
+
+    def _candidates(self, state: _GridState, lat: float, lng: float, radius_meters: float) -> np.ndarray:
+        d_lat = radius_meters / METERS_PER_DEGREE_LAT
+        # Widen the longitude span at the box edge nearest the pole.
+        max_abs_lat = min(abs(lat) + d_lat, 89.0)
+        d_lng = radius_meters / (METERS_PER_DEGREE_LAT * np.cos(np.radians(max_abs_lat)))
+        row_lo, row_hi = (int(np.floor((v + 90.0) / self.cell_size_degrees)) for v in (lat - d_lat, lat + d_lat))
+        col_lo, col_hi = (int(np.floor((v + 180.0) / self.cell_size_degrees)) for v in (lng - d_lng, lng + d_lng))
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64)
+        starts = np.searchsorted(state.sorted_keys, rows * _KEY_STRIDE + col_lo, side="left")
+        ends = np.searchsorted(state.sorted_keys, rows * _KEY_STRIDE + col_hi, side="right")
+        spans = [state.order[s:e] for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def _query_radius(self, state: _GridState, lat: float, lng: float,
+                      radius_meters: float) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self._candidates(state, lat, lng, radius_meters)
+        distances = haversine_meters_vec(lat, lng, state.lats[rows], state.lngs[rows])
+        keep = distances <= radius_meters
+        rows, distances = rows[keep], distances[keep]
+        nearest = np.argsort(distances, kind="stable")
+        return rows[nearest], distances[nearest]
+
+    def query_radius(self, lat: float, lng: float, radius_meters: float) -> Tuple[List[Any], np.ndarray]:
+        """
+        Returns (items, distances_meters) for every point within `radius_meters`,
+        nearest first.
+        """
+        state = self._state
+        if state is None:
+            return [], np.empty(0)
+        rows, distances = self._query_radius(state, lat, lng, radius_meters)
+        return [state.items[row] for row in rows], distances
+
+    def query_nearest(self, lat: float, lng: float, k: int,
+                      initial_radius_meters: float = 1000.0) -> Tuple[List[Any], np.ndarray]:
+        """
+        Returns (items, distances_meters) for the `k` nearest points, nearest first.
+        Searches growing radii until `k` points fall within one.
+        """
+        state = self._state
+        if state is None or k <= 0:
+            return [], np.empty(0)
+        k = min(k, len(state.ids))
+        radius = initial_radius_meters
+        while True:
+            rows, distances = self._query_radius(state, lat, lng, radius)
+            if len(rows) >= k or radius >= np.pi * EARTH_RADIUS_METERS:
+                rows, distances = rows[:k], distances[:k]
+                return [state.items[row] for row in rows], distances
+            radius *= 2
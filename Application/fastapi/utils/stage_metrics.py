@@ -0,0 +1,49 @@
+# damg7245_final_project/Application/fastapi/utils/stage_metrics.py
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict
+
+import numpy as np
+
+
+class StageMetrics:
+    """
+    Latency per named pipeline stage (e.g. 'vector', 'rerank', 'completion'),
+    summarised over the last `window` observations of each stage.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._counts[stage] += 1
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            stage: {
+                "count": counts[stage],
+                "mean_ms": round(float(values.mean()) * 1000, 3),
+                "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+                "p95_ms": round(float(np.percentile(values, 95)) * 1000, 3),
+                "max_ms": round(float(values.max()) * 1000, 3),
+            }
+            for stage, values in samples.items() if len(values)
+        }
@@ -0,0 +1,141 @@
+# damg7245_final_project/Application/fastapi/utils/streaming.py
+
+import asyncio
+import json
+import re
+from typing import Any, Dict, Optional
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Sent while the agent is busy in a tool so proxies do not drop the idle connection.
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+_DONE = object()
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamCancelled(Exception):
+    pass
+
+
+class _FinalAnswerExtractor:
+    """
+    The conversational ReAct agent replies with a JSON blob such as
+    {"action": "Final Answer", "action_input": "..."}. Fed the raw tokens of one
+    LLM call, this returns only the decoded text of `action_input` once the action
+    is known to be the final answer, so users never see tool-call JSON.
+    """
+
+    _START = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self._buffer = ""
+        self._position: Optional[int] = None
+        self._finished = False
+
+    def feed(self, token: str) -> str:
+        if self._finished:
+            return ""
+        self._buffer += token
+        if self._position is None:
+            match = self._START.search(self._buffer)
+            if not match:
+                return ""
+            self._position = match.end()
+        out = []
+        i, buffer = self._position, self._buffer
+        while i < len(buffer):
+            ch = buffer[i]
+            if ch == '"':
+                self._finished = True
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            # Wait for the rest of an escape sequence split across tokens.
+            if i + 1 >= len(buffer):
+                break
+            code = buffer[i + 1]
+            if code == "u":
+                if i + 6 > len(buffer):
+                    break
+                out.append(chr(int(buffer[i + 2:i + 6], 16)))
+                i += 6
+            else:
+                out.append(self._ESCAPES.get(code, code))
+                i += 2
+        self._position = i
+        return "".join(out)
+
+
+class AgentStreamHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns an agent run into a queue of
+    server-sent events: `step` when a tool is chosen, `observation` when it
+    returns, and `token` for each piece of the final answer as the LLM writes it.
+
+    The agent runs on a worker thread; events are handed to the event loop the
+    handler was created on and read back with `iter_events`. Set `cancelled`
+    (e.g. when the client disconnects) and the next callback raises, which aborts
+    the run instead of letting it spend the full budget.
+    """
+
+    raise_error = True
+
+    def __init__(self, observation_chars: int = 500):
+        self._loop = asyncio.get_running_loop()
+        self.events: "asyncio.Queue" = asyncio.Queue()
+        self.observation_chars = observation_chars
+        self.cancelled = False
+        self.finished = False
+        self._extractor = _FinalAnswerExtractor()
+
+    def _put(self, event: str, data: Dict[str, Any]):
+        if self.cancelled:
+            raise StreamCancelled("Client disconnected.")
+        self._loop.call_soon_threadsafe(self.events.put_nowait, sse_event(event, data))
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._extractor = _FinalAnswerExtractor()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._extractor = _FinalAnswerExtractor()
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        text = self._extractor.feed(token)
+        if text:
+            self._put("token", {"text": text})
+        elif self.cancelled:
+            raise StreamCancelled("Client disconnected.")
+
+    def on_agent_action(self, action, **kwargs):
+        self._put("step", {"tool": action.tool, "tool_input": action.tool_input})
+
+    def on_tool_end(self, output, **kwargs):
+        self._put("observation", {"output": str(output)[:self.observation_chars]})
+
+    def finish(self, event: str, data: Dict[str, Any]):
+        # Only the first call counts; later ones would land after the stream closed.
+        if self.finished:
+            return
+        self.finished = True
+        self._loop.call_soon_threadsafe(self.events.put_nowait, sse_event(event, data))
+        self._loop.call_soon_threadsafe(self.events.put_nowait, _DONE)
+
+    async def iter_events(self, keepalive_seconds: float = 15.0):
+        while True:
+            try:
+                item = await asyncio.wait_for(self.events.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield SSE_KEEPALIVE
+                continue
+            if item is _DONE:
+                return
+            yield item
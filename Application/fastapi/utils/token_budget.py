@@ -0,0 +1,99 @@
+# damg7245_final_project/Application/fastapi/utils/token_budget.py
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # encoding_for_model downloads the BPE file on first use; offline hosts fall back to an estimate.
+        logger.warning(f"No tiktoken encoding for {model}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4") -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def _sentence_key(sentence: str) -> str:
+    return re.sub(r"\W+", " ", sentence).strip().lower()
+
+
+def pack_context(matches: List[Dict[str, Any]], budget_tokens: int, min_score: Optional[float] = None,
+                 model: str = "gpt-4") -> Tuple[List[str], List[str], Dict[str, int]]:
+    """
+    Turns ranked retrieval matches into the context chunks sent to the LLM:
+    matches whose cosine score is below `min_score` are dropped (lexical-only
+    matches, flagged `lexical_only`, are exempt), sentences already included
+    from a higher-ranked chunk are removed (chunks of the same regulation
+    overlap heavily), and chunks are added in rank order until `budget_tokens`
+    is spent, truncating the last one to fit.
+
+    Returns (chunks, ids of the matches used, report of what was counted and cut).
+    """
+    report = {"matches": len(matches), "dropped_low_score": 0, "duplicate_sentences": 0,
+              "truncated": 0, "dropped_over_budget": 0, "context_tokens": 0}
+    seen_sentences = set()
+    chunks, ids = [], []
+    remaining = budget_tokens
+    for match in matches:
+        # Lexical-only hybrid hits have no cosine score to compare; their fused RRF score is on another scale.
+        score = None if match.get("lexical_only") else match.get("vector_score", match.get("score"))
+        if min_score is not None and score is not None and score < min_score:
+            report["dropped_low_score"] += 1
+            continue
+        if remaining <= 0:
+            report["dropped_over_budget"] += 1
+            continue
+        sentences = []
+        for sentence in _SENTENCE_END.split(match["metadata"].get("content") or ""):
+            key = _sentence_key(sentence)
+            if not key:
+                continue
+            if key in seen_sentences:
+                report["duplicate_sentences"] += 1
+                continue
+            seen_sentences.add(key)
+            sentences.append(sentence.strip())
+        if not sentences:
+            continue
+        chunk = " ".join(sentences)
+        tokens = count_tokens(chunk, model)
+        if tokens > remaining:
+            chunk = truncate_to_tokens(chunk, remaining, model)
+            tokens = count_tokens(chunk, model)
+            report["truncated"] += 1
+        chunks.append(chunk)
+        ids.append(match["id"])
+        remaining -= tokens
+        report["context_tokens"] += tokens
+    return chunks, ids, report
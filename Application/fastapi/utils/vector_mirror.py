@@ -0,0 +1,155 @@
+# damg7245_final_project/Application/fastapi/utils/vector_mirror.py
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _MirrorState:
+    def __init__(self, ids: List[str], metadata: List[Dict[str, Any]], matrix: np.ndarray, data_time: float):
+        self.ids = ids
+        self.metadata = metadata
+        self.matrix = matrix
+        self.data_time = data_time
+
+
+class VectorMirror:
+    """
+    Local copy of a Pinecone index for exact top-k cosine search with NumPy.
+
+    A background thread lists and fetches every vector every
+    `refresh_interval_seconds` and writes them to `directory` as a float32 matrix
+    of unit-length rows (`vectors.f32`) plus ids and metadata (`meta.json`); the
+    matrix is memory-mapped, so a restart, or a host without network access,
+    serves from the last snapshot. Callers fall back to Pinecone while the
+    mirror is empty or older than `max_age_seconds`.
+    """
+
+    def __init__(self, index, directory: Optional[str], refresh_interval_seconds: float,
+                 max_age_seconds: float, dim: int = 1536, fetch_batch_size: int = 100):
+        self.index = index
+        self.directory = directory
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self.dim = dim
+        self.fetch_batch_size = fetch_batch_size
+        self._state: Optional[_MirrorState] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._counters = {"queries": 0, "refreshes": 0, "refresh_errors": 0}
+        if directory:
+            self._load_local()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="vector-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self._counters["refresh_errors"] += 1
+                logger.error(f"Vector mirror refresh failed: {e}")
+            self._stop.wait(self.refresh_interval_seconds)
+
+    def _fetch_all(self):
+        ids, metadata, vectors = [], [], []
+        # Serverless indexes page their ids through list(); fetch() returns values and metadata.
+        for page in self.index.list():
+            for start in range(0, len(page), self.fetch_batch_size):
+                fetched = self.index.fetch(ids=page[start:start + self.fetch_batch_size]).vectors
+                for vector_id, vector in fetched.items():
+                    ids.append(vector_id)
+                    metadata.append(dict(vector.metadata or {}))
+                    vectors.append(vector.values)
+        return ids, metadata, vectors
+
+    def refresh(self):
+        ids, metadata, vectors = self._fetch_all()
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        state = _MirrorState(ids, metadata, matrix, time.time())
+        if self.directory:
+            state = self._save_local(state)
+        self._state = state
+        self._counters["refreshes"] += 1
+        logger.info(f"Vector mirror loaded {len(ids)} vectors.")
+
+    def _save_local(self, state: _MirrorState) -> _MirrorState:
+        vectors_path = os.path.join(self.directory, "vectors.f32")
+        meta_path = os.path.join(self.directory, "meta.json")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            state.matrix.tofile(f"{vectors_path}.tmp")
+            with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"data_time": state.data_time, "dim": self.dim, "ids": state.ids,
+                           "metadata": state.metadata}, f)
+            # A reader between the two renames sees a row-count mismatch and skips the files.
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+            os.replace(f"{meta_path}.tmp", meta_path)
+        except OSError as e:
+            logger.warning(f"Could not write vector mirror to {self.directory}: {e}")
+            return state
+        return self._map(state.ids, state.metadata, state.data_time) or state
+
+    def _map(self, ids: List[str], metadata: List[Dict[str, Any]], data_time: float) -> Optional[_MirrorState]:
+        vectors_path = os.path.join(self.directory, "vectors.f32")
+        if not ids or os.path.getsize(vectors_path) != len(ids) * self.dim * 4:
+            return None
+        matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(len(ids), self.dim))
+        return _MirrorState(ids, metadata, matrix, data_time)
+
+    def _load_local(self):
+        meta_path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                return
+            self._state = self._map(meta["ids"], meta["metadata"], meta["data_time"])
+            if self._state is not None:
+                logger.info(f"Loaded {len(self._state.ids)} vectors from {self.directory}.")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable vector mirror in {self.directory}: {e}")
+
+    def is_fresh(self) -> bool:
+        state = self._state
+        return state is not None and len(state.ids) > 0 and time.time() - state.data_time < self.max_age_seconds
+
+    def query(self, vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """Returns matches shaped like Pinecone's: {"id", "score", "metadata"}, best first."""
+        state = self._state
+        if state is None or not state.ids:
+            return []
+        self._counters["queries"] += 1
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        scores = state.matrix @ (q / norm if norm else q)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{"id": state.ids[i], "score": float(scores[i]), "metadata": state.metadata[i]} for i in top]
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        stats = dict(self._counters)
+        stats["vectors"] = len(state.ids) if state is not None else 0
+        stats["data_age_seconds"] = time.time() - state.data_time if state is not None else None
+        stats["fresh"] = self.is_fresh()
+        return stats
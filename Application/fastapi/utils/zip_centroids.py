@@ -0,0 +1,106 @@
+# damg7245_final_project/Application/fastapi/utils/zip_centroids.py
+
+import csv
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ma_zip_centroids.bin"
+)
+
+# One fixed-width record per ZIP: 5 ASCII digits, latitude, longitude (little-endian doubles).
+_RECORD = struct.Struct("<5sdd")
+
+
+class ZipCentroidTable:
+    """
+    Memory-mapped ZIP -> (lat, lng) table. The file is mapped once and indexed by ZIP,
+    so lookups are a dict hit plus one struct unpack. ZIPs resolved at runtime are
+    appended to the same file so they survive restarts, and kept in memory until then;
+    the map itself is never replaced, so readers need no lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mm: Optional[mmap.mmap] = None
+        self._offsets: Dict[str, int] = {}
+        self._added: Dict[str, Dict[str, float]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < _RECORD.size:
+            logger.warning(f"ZIP centroid table {self.path} is missing or empty; every lookup will be a miss.")
+            return
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = {}
+        for offset in range(0, len(mm) - _RECORD.size + 1, _RECORD.size):
+            offsets[mm[offset:offset + 5].decode("ascii")] = offset
+        # Publish the map before the offsets so a reader never sees an offset past its end.
+        self._mm = mm
+        self._offsets = offsets
+        logger.info(f"Loaded {len(offsets)} ZIP centroids from {self.path}.")
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._added)
+
+    def __contains__(self, zip_code: str) -> bool:
+        return zip_code in self._offsets or zip_code in self._added
+
+    def get(self, zip_code: str) -> Optional[Dict[str, float]]:
+        offset = self._offsets.get(zip_code)
+        if offset is None:
+            return self._added.get(zip_code)
+        _, lat, lng = _RECORD.unpack_from(self._mm, offset)
+        return {"lat": lat, "lng": lng}
+
+    def add(self, zip_code: str, lat: float, lng: float):
+        if not _is_zip(zip_code):
+            return
+        with self._lock:
+            if zip_code in self:
+                return
+            self._added[zip_code] = {"lat": lat, "lng": lng}
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "ab") as f:
+                    # Drop a record torn by an earlier crash so this one starts on a record boundary.
+                    f.truncate(f.tell() - f.tell() % _RECORD.size)
+                    f.seek(0, os.SEEK_END)
+                    f.write(_RECORD.pack(zip_code.encode("ascii"), lat, lng))
+            except OSError as e:
+                logger.warning(f"Could not write ZIP {zip_code} back to {self.path}: {e}")
+
+
+def _is_zip(zip_code: str) -> bool:
+    return isinstance(zip_code, str) and len(zip_code) == 5 and zip_code.isdigit()
+
+
+def build_table(rows: Iterable[Tuple[str, float, float]], path: str = DEFAULT_TABLE_PATH) -> int:
+    """
+    Writes a fresh table from (zip, lat, lng) rows, sorted by ZIP. Returns the record count.
+    """
+    records = {zip_code: (float(lat), float(lng)) for zip_code, lat, lng in rows if _is_zip(zip_code)}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        for zip_code in sorted(records):
+            lat, lng = records[zip_code]
+            f.write(_RECORD.pack(zip_code.encode("ascii"), lat, lng))
+    return len(records)
+
+
+# Rebuild the bundled table from a CSV with zip,lat,lng columns:
+#   python -m utils.zip_centroids ma_zip_centroids.csv
+if __name__ == "__main__":
+    with open(sys.argv[1], newline="") as f:
+        reader = csv.DictReader(f)
+        count = build_table((row["zip"].zfill(5), row["lat"], row["lng"]) for row in reader)
+    print(f"Wrote {count} ZIP centroids to {DEFAULT_TABLE_PATH}")
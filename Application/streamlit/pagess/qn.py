@@ -4,6 +4,7 @@ import requests
 import os
 import json
 import math
+from pagess.sse import iter_sse_events
 
 def clean_data_for_json(obj):
     if isinstance(obj, float) and math.isnan(obj):
@@ -57,18 +58,39 @@ def show_qn_page(api_base_url, city):
 
             json_payload = json.dumps(payload)
 
-            response = requests.post(
-                f"{api_base_url}/qn_agent", 
-                data=json_payload,
-                headers=headers
-            )
+            # Show earlier turns now; the new answer streams in below them.
+            for speaker, msg in st.session_state["qn_history"]:
+                st.markdown(f"**{speaker}:** {msg}")
 
-            if response.status_code == 200:
-                data = response.json()
-                answer = data.get("answer", "No answer")
-                st.session_state["qn_history"].append(("Assistant", answer))
-            else:
-                st.session_state["qn_history"].append(("Assistant", f"Error: {response.text}"))
+            status = st.status("Working on it...")
+            answer_placeholder = st.empty()
+            answer = ""
+            try:
+                with requests.post(
+                    f"{api_base_url}/qn_agent/stream",
+                    data=json_payload,
+                    headers=headers,
+                    stream=True
+                ) as response:
+                    if response.status_code != 200:
+                        answer = f"Error: {response.text}"
+                    else:
+                        for event, data in iter_sse_events(response):
+                            if event == "step":
+                                status.write(f"Using **{data['tool']}**: {data['tool_input']}")
+                            elif event == "token":
+                                answer += data["text"]
+                                answer_placeholder.markdown(f"**Assistant:** {answer}▌")
+                            elif event == "done":
+                                answer = data.get("answer", "No answer")
+                            elif event == "error":
+                                answer = f"Error: {data.get('detail', 'Unknown error')}"
+            except Exception as e:
+                answer = f"Error: {e}"
+            status.update(label="Done", state="complete")
+            answer_placeholder.empty()
+            st.session_state["qn_history"].append(("Assistant", answer))
+            st.rerun()
 
     # Display conversation history
     for speaker, msg in st.session_state["qn_history"]:
@@ -3,6 +3,7 @@
 import streamlit as st
 import requests
 from io import BytesIO
+from pagess.sse import iter_sse_events
 
 
 def show_regulations_page(api_base_url):
@@ -16,16 +17,21 @@ def show_regulations_page(api_base_url):
         if query.strip():
             payload = {"question": query}
             try:
-                # Making a POST request to the FastAPI /ask endpoint
-                response = requests.post(f"{api_base_url}/ask", json=payload)
-                
-                # Handling the response
-                if response.status_code == 200:
-                    answer = response.json().get("answer", "No answer found.")
-                    st.write(f"**Answer:** {answer}")
-                else:
-                    error_detail = response.json().get('detail', 'Unknown error')
-                    st.error(f"Error: {error_detail}")
+                # Stream the answer from /ask/stream so it renders as GPT-4 writes it
+                answer_placeholder = st.empty()
+                with requests.post(f"{api_base_url}/ask/stream", json=payload, stream=True) as response:
+                    if response.status_code != 200:
+                        error_detail = response.json().get('detail', 'Unknown error')
+                        st.error(f"Error: {error_detail}")
+                        return
+                    answer = ""
+                    for event, data in iter_sse_events(response):
+                        if event == "token":
+                            answer += data["text"]
+                            answer_placeholder.markdown(f"**Answer:** {answer}▌")
+                        elif event == "done":
+                            answer_placeholder.markdown(f"**Answer:** {data.get('answer') or 'No answer found.'}")
+                        elif event == "error":
+                            st.error(f"Error: {data.get('detail', 'Unknown error')}")
             except Exception as e:
                 st.error(f"Failed to connect to the backend: {e}")
-        
\ No newline at end of file
@@ -1,10 +1,13 @@
 # damg7245_final_project/Application/streamlit/pagess/restaurants.py
 
+import json
 import streamlit as st
 import requests
 import pandas as pd
 import altair as alt
 
+TABLE_COLUMNS = ["name", "address", "rating", "user_ratings_total", "cuisine_types", "website"]
+
 def show_restaurants_page(api_base_url: str):
     st.title("Restaurants Nearby & Analysis")
 
@@ -18,28 +21,39 @@ def show_restaurants_page(api_base_url: str):
         st.warning("Please enter a ZIP code in the sidebar.")
         return
 
+    st.subheader("Restaurant Data")
+    table_placeholder = st.empty()
+
     # We'll store data in st.session_state['restaurants_data'] keyed by zip_code
     if 'cached_zip_code' not in st.session_state or st.session_state.cached_zip_code != zip_code:
-        # Fetch fresh data
+        # Fetch fresh data; pages are streamed as NDJSON so the table fills in as they arrive
         headers = {"Authorization": f"Bearer {st.session_state.token}"}
-        url = f"{api_base_url}/restaurants"
+        url = f"{api_base_url}/restaurants/stream"
         params = {"zip_code": zip_code}
 
+        restaurants = []
         with st.spinner("Fetching restaurant data..."):
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                restaurants = data.get("restaurants", [])
-                st.session_state.restaurants_data = restaurants
-                st.session_state.cached_zip_code = zip_code
-            else:
-                st.error("Failed to fetch restaurants. Check your credentials and API endpoints.")
-                return
+            with requests.get(url, headers=headers, params=params, stream=True) as response:
+                if response.status_code != 200:
+                    st.error("Failed to fetch restaurants. Check your credentials and API endpoints.")
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    page = json.loads(line)
+                    if "error" in page:
+                        st.error(f"Failed to fetch restaurants: {page['error']}")
+                        return
+                    restaurants.extend(page.get("restaurants", []))
+                    table_placeholder.dataframe(pd.DataFrame(restaurants)[TABLE_COLUMNS].fillna("N/A"))
+        st.session_state.restaurants_data = restaurants
+        st.session_state.cached_zip_code = zip_code
     else:
         # Use cached data
         restaurants = st.session_state.restaurants_data
 
     if not restaurants:
+        table_placeholder.empty()
         st.info("No restaurants found in this area.")
         return
 
@@ -50,8 +64,7 @@ def show_restaurants_page(api_base_url: str):
     st.session_state["restaurants_for_qn"] = df.to_dict(orient='records')
 
     # Show basic table
-    st.subheader("Restaurant Data")
-    st.dataframe(df[["name", "address", "rating", "user_ratings_total", "cuisine_types", "website"]].fillna("N/A"))
+    table_placeholder.dataframe(df[TABLE_COLUMNS].fillna("N/A"))
 
     # Visualization: Count of restaurants by cuisine
     st.subheader("Restaurants by Cuisine Type")
@@ -0,0 +1,18 @@
+# damg7245_final_project/Application/streamlit/pagess/sse.py
+import json
+
+
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a streamed text/event-stream response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith(":"):
+            continue  # keep-alive comment
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())